@@ -0,0 +1,521 @@
+import asyncio
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+QUEUED = "queued"
+RUNNING = "running"
+FINISHED = "finished"
+FAILED = "failed"
+CANCELLED = "cancelled"
+DONE_STATES = (FINISHED, FAILED, CANCELLED)
+
+READ_CHUNK_SIZE = 65536
+FINISHED_OUTPUT_LINES = 50  # Output kept per job once it is done
+MAX_LINE_LENGTH = 1024 * 1024
+
+
+def parse_to_check(line):
+    """
+    Extracts the remaining and total file counts from an rsync `--progress` line.
+
+    Both the `to-check=` spelling of older rsync releases and the `to-chk=` spelling of
+    newer ones are understood.
+
+    Args:
+        line (str): A line of rsync output.
+
+    Returns:
+        tuple: (to_check, total), or None if the line carries no file counts.
+    """
+    for marker in ("to-check=", "to-chk="):
+        if marker in line:
+            try:
+                counts = line.split(marker)[1].split(")")[0].split("/")
+                return int(counts[0]), int(counts[1])
+            except (IndexError, ValueError):
+                return None
+    return None
+
+
+class Job:
+    """
+    State of a single job submitted to the AsyncRunner.
+
+    Attributes:
+        id (int): Identifier assigned by the runner.
+        name (str): Human readable name of the job.
+        command (list): The command to execute, or None for a job made only of `prepare`.
+        prepare (callable): Optional blocking step run in a worker thread before the command.
+            It receives a JobReporter to report its own output and progress.
+        state (str): One of queued, running, finished, failed or cancelled.
+        returncode (int): Exit code of the command once it has finished.
+        progress (int): Last progress percentage parsed from the output.
+        output (deque): The most recent output lines, bounded by the runner's buffer size.
+        error (str): Description of the failure, if any.
+    """
+
+    def __init__(self, job_id, name, command, prepare, buffer_lines):
+        self.id = job_id
+        self.name = name
+        self.command = command
+        self.prepare = prepare
+        self.state = QUEUED
+        self.returncode = None
+        self.progress = 0
+        self.total_files = None
+        self.output = deque(maxlen=buffer_lines)
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.ended = None
+        self.process = None
+        self.slot_request = None  # Pending wait for a prepare thread while queued
+        self.cancel_requested = False
+        self.done = threading.Event()
+
+    def snapshot(self):
+        """
+        Returns a JSON-serializable summary of the job.
+        """
+        return {
+            "id": self.id,
+            "name": self.name,
+            "command": self.command,
+            "state": self.state,
+            "returncode": self.returncode,
+            "progress": self.progress,
+            "error": self.error,
+            "submitted": self.submitted,
+            "started": self.started,
+            "ended": self.ended,
+        }
+
+
+class JobReporter:
+    """
+    Callable handed to a job's prepare step to report from its worker thread.
+
+    Calling it with a line adds the line to the job's output; `progress(value)` sets the job's
+    progress, and `cancelled` tells the step that the job has been cancelled.
+    """
+
+    def __init__(self, runner, job):
+        self.runner = runner
+        self.job = job
+
+    def __call__(self, line):
+        # Lines forwarded from passes or mirrors carry their own `to-chk=` counts; the job's
+        # progress is set only through `progress`
+        self.runner.loop.call_soon_threadsafe(self.runner.emit_output, self.job, line, False)
+
+    def progress(self, value):
+        self.runner.loop.call_soon_threadsafe(self.runner.emit_progress, self.job, value)
+
+    @property
+    def cancelled(self):
+        return self.job.cancel_requested
+
+
+class AsyncRunner:
+    """
+    Execution core that runs many rsync processes on a single asyncio event loop.
+
+    The loop lives in one background thread and multiplexes the output of every running
+    process, so the number of threads does not grow with the number of jobs. Every job keeps
+    only a bounded buffer of its most recent output. Interested parties, such as the Qt bridge
+    or the control socket, register listeners that receive event dictionaries on the loop
+    thread:
+
+        {"type": "state", "job": id, "state": state, ...}
+        {"type": "output", "job": id, "line": line}
+        {"type": "progress", "job": id, "value": percent}
+
+    Methods:
+        start():
+            Starts the event loop thread.
+
+        stop():
+            Cancels all jobs and stops the event loop thread.
+
+        submit(command, name, prepare):
+            Queues a job from any thread and returns its identifier.
+
+        cancel(job_id):
+            Requests cancellation of a queued or running job.
+
+        list_jobs():
+            Returns snapshots of the known jobs.
+
+        wait(job_id, timeout):
+            Blocks the calling thread until the job is done.
+    """
+
+    def __init__(self, max_concurrent=64, buffer_lines=1000, history=500, max_prepare=8):
+        """
+        Initializes the AsyncRunner object.
+
+        Args:
+            max_concurrent (int): Maximum number of jobs executing at the same time.
+            buffer_lines (int): Number of output lines kept per job.
+            history (int): Number of finished jobs remembered for `list_jobs`.
+            max_prepare (int): Maximum number of prepare steps running at the same time. Each
+                holds a thread of its own for as long as it runs.
+        """
+        self.max_concurrent = max_concurrent
+        self.max_prepare = max_prepare
+        self.buffer_lines = buffer_lines
+        self.history = history
+        self.loop = None
+        self.thread = None
+        self.semaphore = None
+        self.prepare_slots = None
+        self.prepare_executor = None
+        self.jobs = {}
+        self.finished_ids = deque()
+        self.listeners = []
+        self.lock = threading.Lock()
+        self.ids = itertools.count(1)
+        self.ready = threading.Event()
+
+    def start(self):
+        """
+        Starts the event loop thread. Calling it again while running has no effect.
+        """
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.ready.clear()
+        self.thread = threading.Thread(target=self.run_loop, name="SyncMateRunner", daemon=True)
+        self.thread.start()
+        self.ready.wait()
+
+    def run_loop(self):
+        """
+        Body of the loop thread.
+        """
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.attach_child_watcher()
+        self.semaphore = asyncio.Semaphore(self.max_concurrent)
+        self.prepare_slots = asyncio.Semaphore(self.max_prepare)
+        self.prepare_executor = ThreadPoolExecutor(self.max_prepare, thread_name_prefix="SyncMatePrepare")
+        self.loop.call_soon(self.ready.set)
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.run_until_complete(self.loop.shutdown_asyncgens())
+            self.loop.close()
+            self.prepare_executor.shutdown(wait=False)
+
+    def attach_child_watcher(self):
+        """
+        Reaps child processes through pidfds on the loop itself where available.
+
+        Before Python 3.12 the default watcher starts one thread per child process, which
+        defeats the purpose of the runner.
+        """
+        if sys.version_info >= (3, 12) or not sys.platform.startswith("linux"):
+            return
+        if not hasattr(asyncio, "PidfdChildWatcher"):
+            return
+        try:
+            os.close(os.pidfd_open(os.getpid()))
+        except (AttributeError, OSError):
+            return  # Kernel without pidfd support
+        watcher = asyncio.PidfdChildWatcher()
+        watcher.attach_loop(self.loop)
+        asyncio.set_child_watcher(watcher)
+
+    def stop(self):
+        """
+        Cancels all jobs and stops the event loop thread.
+        """
+        if self.loop is None or not self.thread.is_alive():
+            return
+        for job in self.list_jobs():
+            if job["state"] not in DONE_STATES:
+                self.cancel(job["id"])
+        future = asyncio.run_coroutine_threadsafe(self.drain(), self.loop)
+        try:
+            future.result(timeout=5)
+        except Exception:
+            pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=5)
+
+    async def drain(self):
+        """
+        Waits for every task still running on the loop, except the caller.
+        """
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        if tasks:
+            await asyncio.wait(tasks, timeout=4)
+
+    def add_listener(self, listener):
+        """
+        Registers a callable that receives every event on the loop thread.
+
+        Args:
+            listener (callable): Function taking an event dictionary. It must not block.
+        """
+        with self.lock:
+            self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        """
+        Unregisters a listener added with `add_listener`.
+        """
+        with self.lock:
+            if listener in self.listeners:
+                self.listeners.remove(listener)
+
+    def submit(self, command, name=None, prepare=None):
+        """
+        Queues a job. Safe to call from any thread.
+
+        Args:
+            command (list): The command to execute, or None.
+            name (str): Human readable name; defaults to the command line.
+            prepare (callable): Optional blocking step run in a worker thread before the command.
+
+        Returns:
+            int: The job identifier.
+        """
+        self.start()
+        job_id = next(self.ids)
+        job = Job(job_id, name or " ".join(command or []), command, prepare, self.buffer_lines)
+        with self.lock:
+            self.jobs[job_id] = job
+        self.loop.call_soon_threadsafe(self.schedule, job)
+        return job_id
+
+    def schedule(self, job):
+        """
+        Creates the task for a job on the loop thread.
+        """
+        self.publish({"type": "state", "job": job.id, "state": job.state, "name": job.name})
+        self.loop.create_task(self.execute(job))
+
+    def cancel(self, job_id):
+        """
+        Requests cancellation of a queued or running job. Safe to call from any thread.
+
+        Args:
+            job_id (int): The job identifier.
+
+        Returns:
+            bool: True if the job was known and not yet done.
+        """
+        job = self.get_job(job_id)
+        if job is None or job.state in DONE_STATES:
+            return False
+        job.cancel_requested = True
+        self.loop.call_soon_threadsafe(self.terminate, job)
+        return True
+
+    def terminate(self, job):
+        """
+        Terminates the process of a job on the loop thread, or takes it out of the queue if
+        it is waiting for a prepare thread.
+        """
+        if job.slot_request is not None:
+            job.slot_request.cancel()
+        if job.process is not None and job.process.returncode is None:
+            try:
+                job.process.terminate()
+            except ProcessLookupError:
+                pass
+
+    def get_job(self, job_id):
+        """
+        Returns the Job with the given identifier, or None.
+        """
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def list_jobs(self):
+        """
+        Returns snapshots of the queued, running and recently finished jobs.
+        """
+        with self.lock:
+            jobs = list(self.jobs.values())
+        return [job.snapshot() for job in jobs]
+
+    def recent_output(self, job_id):
+        """
+        Returns the buffered output lines of a job.
+        """
+        job = self.get_job(job_id)
+        return list(job.output) if job is not None else []
+
+    def wait(self, job_id, timeout=None):
+        """
+        Blocks the calling thread until the job is done. Must not be called on the loop thread.
+
+        Returns:
+            dict: The snapshot of the job, or None if it is unknown.
+        """
+        job = self.get_job(job_id)
+        if job is None:
+            return None
+        job.done.wait(timeout)
+        return job.snapshot()
+
+    def publish(self, event):
+        """
+        Delivers an event to every listener. Runs on the loop thread.
+        """
+        with self.lock:
+            listeners = list(self.listeners)
+        for listener in listeners:
+            try:
+                listener(event)
+            except Exception:
+                pass
+
+    def emit_progress(self, job, value):
+        """
+        Records and publishes a progress value reported by a prepare step.
+        """
+        if value != job.progress:
+            job.progress = value
+            self.publish({"type": "progress", "job": job.id, "value": value})
+
+    def emit_output(self, job, line, parse_progress=True):
+        """
+        Buffers an output line of a job, publishes it and updates the job's progress.
+
+        Args:
+            job (Job): The job the line belongs to.
+            line (str): The output line.
+            parse_progress (bool): Whether the line's `to-chk=` counts set the job's progress.
+        """
+        job.output.append(line)
+        self.publish({"type": "output", "job": job.id, "line": line})
+        if not parse_progress:
+            return
+
+        counts = parse_to_check(line)
+        if counts is None:
+            return
+        to_check, total = counts
+        if job.total_files is None:
+            job.total_files = total
+        if job.total_files:
+            progress = int((total - to_check) * 100 / job.total_files)
+            if progress != job.progress:
+                job.progress = progress
+                self.publish({"type": "progress", "job": job.id, "value": progress})
+
+    async def execute(self, job):
+        """
+        Runs a job to completion. A job with a prepare step stays queued until one of the
+        prepare threads is free, since the step holds its thread for the whole sync.
+        """
+        if job.prepare is None:
+            await self.run_job(job)
+            return
+        job.slot_request = asyncio.ensure_future(self.prepare_slots.acquire())
+        try:
+            await job.slot_request
+        except asyncio.CancelledError:
+            self.complete(job, CANCELLED)
+            return
+        finally:
+            job.slot_request = None
+        try:
+            await self.run_job(job)
+        finally:
+            self.prepare_slots.release()
+
+    async def run_job(self, job):
+        """
+        Runs the prepare step and the command of a job. Only the command counts against the
+        concurrency limit, so a prepare step may itself submit jobs and wait for them.
+        """
+        if job.cancel_requested:
+            self.complete(job, CANCELLED)
+            return
+        job.state = RUNNING
+        job.started = time.time()
+        self.publish({"type": "state", "job": job.id, "state": RUNNING, "name": job.name})
+        try:
+            if job.prepare is not None:
+                await self.loop.run_in_executor(self.prepare_executor, job.prepare, JobReporter(self, job))
+            if job.command is not None and not job.cancel_requested:
+                async with self.semaphore:
+                    if not job.cancel_requested:
+                        job.returncode = await self.run_process(job)
+        except Exception as e:
+            job.error = str(e)
+            self.complete(job, CANCELLED if job.cancel_requested else FAILED)
+            return
+
+        if job.cancel_requested:
+            self.complete(job, CANCELLED)
+        elif job.returncode not in (None, 0):
+            job.error = f"Rsync exited with code {job.returncode}"
+            self.complete(job, FAILED)
+        else:
+            self.complete(job, FINISHED)
+
+    async def run_process(self, job):
+        """
+        Starts the job's command and splits its output into lines on `\\n` and `\\r`.
+
+        Returns:
+            int: The exit code of the process.
+        """
+        job.process = await asyncio.create_subprocess_exec(
+            *job.command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+        )
+        if job.cancel_requested:
+            self.terminate(job)  # Cancelled while the process was being started
+        pending = b""
+        while True:
+            chunk = await job.process.stdout.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            pending += chunk
+            lines = pending.replace(b"\r", b"\n").split(b"\n")
+            pending = lines.pop()
+            if len(pending) > MAX_LINE_LENGTH:
+                lines.append(pending)
+                pending = b""
+            for line in lines:
+                line = line.strip()
+                if line:
+                    self.emit_output(job, line.decode(errors="replace"))
+        if pending.strip():
+            self.emit_output(job, pending.strip().decode(errors="replace"))
+        returncode = await job.process.wait()
+        job.process = None
+        return returncode
+
+    def complete(self, job, state):
+        """
+        Marks a job as done, publishes the final state and forgets old finished jobs.
+        """
+        job.state = state
+        job.ended = time.time()
+        job.prepare = None
+        job.output = deque(job.output, maxlen=FINISHED_OUTPUT_LINES)
+        self.publish({
+            "type": "state",
+            "job": job.id,
+            "state": state,
+            "name": job.name,
+            "returncode": job.returncode,
+            "error": job.error,
+        })
+        job.done.set()
+        with self.lock:
+            self.finished_ids.append(job.id)
+            while len(self.finished_ids) > self.history:
+                self.jobs.pop(self.finished_ids.popleft(), None)
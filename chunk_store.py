@@ -0,0 +1,610 @@
+import hashlib
+import json
+import mmap
+import multiprocessing
+import os
+import stat as stat_module
+import tempfile
+import time
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from path_utils import is_excluded
+
+CHUNK_STORE = "Chunk Store"  # Destination type selecting a chunk store instead of a mirror
+
+MIN_CHUNK_SIZE = 256 * 1024
+MAX_CHUNK_SIZE = 4 * 1024 * 1024
+BOUNDARY_BITS = 20  # Chunks average MIN_CHUNK_SIZE + 1 MiB
+READ_SIZE = 4 * MAX_CHUNK_SIZE
+COMPRESSION_LEVEL = 3
+BATCH_BYTES = 64 * 1024 * 1024  # Small changed files are sent to the workers in batches
+BATCH_FILES = 512
+RESTORE_TASK_BYTES = 64 * 1024 * 1024
+MANIFEST_VERSION = 1
+
+RAW_RECORD = b"r"
+ZLIB_RECORD = b"z"
+
+cancel_event = None  # Set in worker processes by `init_worker`
+
+
+def balanced_bits(label, count):
+    """
+    Returns `count` pseudo-random bits, as bytes 0 or 1, of which exactly half are ones.
+
+    They are derived from fixed digests so that chunk boundaries never change between versions.
+    """
+    order = sorted(range(count), key=lambda index: hashlib.sha256(label + index.to_bytes(2, "big")).digest())
+    bits = bytearray(count)
+    for index in order[:count // 2]:
+        bits[index] = 1
+    return bytes(bits)
+
+
+# Maps every byte value to one bit; balanced so that random data yields unbiased bits
+BOUNDARY_TABLE = balanced_bits(b"syncmate chunk boundaries", 256)
+BOUNDARY_PATTERN = balanced_bits(b"syncmate chunk pattern", BOUNDARY_BITS)
+
+
+def chunk_end(bits, start):
+    """
+    Returns the end of the content-defined chunk starting at `start`.
+
+    Every byte is mapped to one bit through `BOUNDARY_TABLE`, and a chunk ends after the first
+    window of `BOUNDARY_BITS` bytes whose bits spell `BOUNDARY_PATTERN`. Boundaries depend
+    only on the bytes around them, so an insertion moves the boundaries near it and no others,
+    and the search runs in C through `bytes.translate` and `bytes.find`. Text full of repeated
+    sequences finds fewer boundaries, so its chunks tend towards `MAX_CHUNK_SIZE`.
+
+    Args:
+        bits (bytes): The buffer holding the chunk, translated through `BOUNDARY_TABLE`. It
+            must extend `MAX_CHUNK_SIZE` bytes past `start` unless it ends where the file ends.
+        start (int): Offset of the chunk in the buffer.
+    """
+    limit = min(start + MAX_CHUNK_SIZE, len(bits))
+    if limit - start <= MIN_CHUNK_SIZE:
+        return limit
+    index = bits.find(BOUNDARY_PATTERN, start + MIN_CHUNK_SIZE - len(BOUNDARY_PATTERN), limit)
+    if index < 0:
+        return limit
+    return index + len(BOUNDARY_PATTERN)
+
+
+def iter_chunks(file):
+    """
+    Yields the content-defined chunks of an open file.
+
+    Args:
+        file (file): File opened in binary mode.
+    """
+    buffer = b""
+    while True:
+        block = file.read(READ_SIZE)
+        buffer += block
+        if block and len(buffer) < MAX_CHUNK_SIZE:
+            continue
+        bits = buffer.translate(BOUNDARY_TABLE)
+        position = 0
+        while position < len(buffer) and (not block or len(buffer) - position >= MAX_CHUNK_SIZE):
+            end = chunk_end(bits, position)
+            yield buffer[position:end]
+            position = end
+        if not block:
+            return
+        buffer = buffer[position:]
+
+
+def chunk_digest(chunk):
+    return hashlib.blake2b(chunk, digest_size=32).hexdigest()
+
+
+def chunk_path(root, digest):
+    return os.path.join(root, "chunks", digest[:2], digest)
+
+
+def write_chunk(path, chunk):
+    """
+    Stores a chunk, compressed unless compression does not make it smaller.
+
+    The chunk is written under a temporary name and renamed into place, so concurrent writers
+    of the same chunk and interrupted runs never leave a partial chunk behind.
+
+    Returns:
+        int: The number of bytes written.
+    """
+    packed = zlib.compress(chunk, COMPRESSION_LEVEL)
+    header, payload = (ZLIB_RECORD, packed) if len(packed) < len(chunk) else (RAW_RECORD, chunk)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as file:
+        file.write(header)
+        file.write(payload)
+    os.replace(temp_path, path)
+    return len(header) + len(payload)
+
+
+def read_chunk(root, digest):
+    """
+    Reads and verifies a stored chunk.
+
+    Raises:
+        ValueError: If the chunk is corrupt.
+    """
+    with open(chunk_path(root, digest), "rb") as file:
+        record = file.read()
+    chunk = zlib.decompress(record[1:]) if record[:1] == ZLIB_RECORD else record[1:]
+    if chunk_digest(chunk) != digest:
+        raise ValueError(f"Chunk {digest} is corrupt")
+    return chunk
+
+
+def init_worker(event):
+    """
+    Receives the event that tells a worker process to stop early.
+    """
+    global cancel_event
+    cancel_event = event
+
+
+def store_files(root, paths, write=True):
+    """
+    Chunks files and stores their new chunks. Runs in a worker process.
+
+    Args:
+        root (str): The chunk store directory.
+        paths (list): Absolute paths of the files.
+        write (bool): False to only count the chunks that would be stored.
+
+    Returns:
+        list: For each file, a tuple (chunks, new_bytes, stored_bytes, error), where chunks is
+        a list of [digest, length] pairs.
+    """
+    results = []
+    seen = set()
+    for path in paths:
+        chunks = []
+        new_bytes = stored_bytes = 0
+        try:
+            with open(path, "rb") as file:
+                for chunk in iter_chunks(file):
+                    if cancel_event is not None and cancel_event.is_set():
+                        return results
+                    digest = chunk_digest(chunk)
+                    chunks.append([digest, len(chunk)])
+                    target = chunk_path(root, digest)
+                    if digest in seen or os.path.exists(target):
+                        continue
+                    seen.add(digest)
+                    new_bytes += len(chunk)
+                    if write:
+                        stored_bytes += write_chunk(target, chunk)
+        except OSError as e:
+            results.append((None, 0, 0, str(e)))
+            continue
+        results.append((chunks, new_bytes, stored_bytes, None))
+    return results
+
+
+def restore_range(root, path, size, chunks, offset):
+    """
+    Writes consecutive chunks into a restored file through a memory map. Runs in a worker thread.
+
+    Args:
+        root (str): The chunk store directory.
+        path (str): The file, already created with its final size.
+        size (int): The size of the file.
+        chunks (list): The [digest, length] pairs to write.
+        offset (int): Offset of the first chunk in the file.
+
+    Returns:
+        int: The number of bytes written.
+    """
+    written = 0
+    with open(path, "r+b") as file, mmap.mmap(file.fileno(), size) as output:
+        for digest, length in chunks:
+            output[offset:offset + length] = read_chunk(root, digest)
+            offset += length
+            written += length
+    return written
+
+
+def scan_source(source, patterns):
+    """
+    Lists the entries of the tree to back up.
+
+    Args:
+        source (str): A directory or a single file.
+        patterns (list): Exclude patterns.
+
+    Returns:
+        tuple: (files, directories, symlinks), mapping relative paths to `os.stat_result`
+        for files and directories and to the link target for symlinks.
+    """
+    if not os.path.isdir(source):
+        return {os.path.basename(source): os.stat(source)}, {}, {}
+
+    files, directories, symlinks = {}, {}, {}
+    for current, names, file_names in os.walk(source):
+        relative_dir = os.path.relpath(current, source)
+        kept = []
+        for name in names:
+            relative_path = os.path.normpath(os.path.join(relative_dir, name))
+            if is_excluded(relative_path, patterns):
+                continue
+            path = os.path.join(current, name)
+            if os.path.islink(path):
+                symlinks[relative_path] = os.readlink(path)
+                continue
+            directories[relative_path] = os.lstat(path)
+            kept.append(name)
+        names[:] = kept
+        for name in file_names:
+            relative_path = os.path.normpath(os.path.join(relative_dir, name))
+            if is_excluded(relative_path, patterns):
+                continue
+            path = os.path.join(current, name)
+            try:
+                stat = os.lstat(path)
+            except OSError:
+                continue
+            if stat_module.S_ISLNK(stat.st_mode):
+                symlinks[relative_path] = os.readlink(path)
+            elif stat_module.S_ISREG(stat.st_mode):
+                files[relative_path] = stat
+    return files, directories, symlinks
+
+
+class ChunkStore:
+    """
+    Deduplicating backup target that stores files as content-defined, compressed chunks.
+
+    Files are split into chunks whose boundaries depend on their content, and every unique
+    chunk is stored once under its hash, so identical data from other hosts or earlier runs
+    costs no space. Each backup records a snapshot manifest listing the chunks of every file.
+    Files whose size, modification time and inode match the previous snapshot of the same
+    source are not read again. Chunking and hashing run in a process pool; restores write the
+    chunks through memory maps from a thread pool.
+
+    Layout of the store directory:
+
+        chunks/ab/abcdef...     one file per chunk, named by its BLAKE2b hash
+        snapshots/NAME.json     one manifest per backup
+
+    Methods:
+        backup(source, report, exclude_patterns, dry_run):
+            Backs up a directory or file and returns the name of the new snapshot.
+
+        restore(name, target, report):
+            Restores a snapshot into a directory.
+
+        list_snapshots():
+            Returns the snapshot names, oldest first.
+    """
+
+    def __init__(self, root, workers=None):
+        """
+        Initializes the ChunkStore object.
+
+        Args:
+            root (str): The store directory; created on first use.
+            workers (int): Number of worker processes or threads; defaults to the CPU count.
+        """
+        self.root = root
+        self.workers = workers or os.cpu_count() or 1
+
+    def initialize(self):
+        """
+        Creates the store layout if needed.
+        """
+        for prefix in range(256):
+            os.makedirs(os.path.join(self.root, "chunks", f"{prefix:02x}"), exist_ok=True)
+        os.makedirs(os.path.join(self.root, "snapshots"), exist_ok=True)
+
+    def list_snapshots(self):
+        """
+        Returns the snapshot names, oldest first.
+        """
+        try:
+            names = os.listdir(os.path.join(self.root, "snapshots"))
+        except OSError:
+            return []
+        return sorted(name[:-5] for name in names if name.endswith(".json"))
+
+    def load_snapshot(self, name):
+        """
+        Reads a snapshot manifest.
+
+        Raises:
+            ValueError: If the snapshot does not exist.
+        """
+        if os.path.basename(name) != name:
+            raise ValueError(f"Invalid snapshot name: {name}")
+        try:
+            with open(os.path.join(self.root, "snapshots", f"{name}.json"), "r") as file:
+                return json.load(file)
+        except OSError:
+            raise ValueError(f"Snapshot '{name}' not found")
+
+    def save_snapshot(self, manifest):
+        """
+        Writes a manifest under a new, time-based name and returns the name.
+
+        The name is claimed with an exclusive create, so concurrent backups never pick the same
+        one, and the manifest is written to a temporary file of its own before replacing the
+        claimed (empty) file.
+        """
+        snapshots_dir = os.path.join(self.root, "snapshots")
+        base = time.strftime("%Y%m%d-%H%M%S")
+        name = base
+        suffix = 2
+        while True:
+            path = os.path.join(snapshots_dir, f"{name}.json")
+            try:
+                os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644))
+                break
+            except FileExistsError:
+                name = f"{base}-{suffix}"
+                suffix += 1
+        manifest["name"] = name
+        descriptor, temp_path = tempfile.mkstemp(prefix=f"{name}.", suffix=".tmp", dir=snapshots_dir)
+        try:
+            with os.fdopen(descriptor, "w") as file:
+                json.dump(manifest, file)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            os.remove(path)
+            raise
+        return name
+
+    def previous_files(self, source):
+        """
+        Returns the file entries of the newest snapshot of the same source.
+        """
+        for name in reversed(self.list_snapshots()):
+            try:
+                manifest = self.load_snapshot(name)
+            except ValueError:
+                continue
+            if manifest.get("source") == source:
+                return manifest["files"]
+        return {}
+
+    def backup(self, source, report, exclude_patterns=(), dry_run=False):
+        """
+        Backs up a directory or a single file as a new snapshot.
+
+        Args:
+            source (str): The directory or file to back up.
+            report (JobReporter): Receives output lines and progress, and tells whether the
+                job was cancelled.
+            exclude_patterns (list): Patterns excluded from the backup.
+            dry_run (bool): Only report what would be stored.
+
+        Returns:
+            str: The name of the new snapshot, or None for a dry run.
+
+        Raises:
+            RuntimeError: If the backup is cancelled.
+        """
+        started = time.monotonic()
+        source = os.path.abspath(source)
+        self.initialize()
+        files, directories, symlinks = scan_source(source, list(exclude_patterns))
+        previous = self.previous_files(source)
+
+        entries = {}
+        changed = []
+        for relative_path, stat in files.items():
+            entry = {
+                "size": stat.st_size,
+                "mtime": stat.st_mtime_ns,
+                "mode": stat.st_mode & 0o7777,
+                "ino": stat.st_ino,
+                "dev": stat.st_dev,
+            }
+            old = previous.get(relative_path)
+            if old is not None and all(old[key] == entry[key] for key in ("size", "mtime", "ino", "dev")):
+                entry["chunks"] = old["chunks"]
+            else:
+                changed.append(relative_path)
+            entries[relative_path] = entry
+        changed_bytes = sum(files[relative_path].st_size for relative_path in changed)
+        report(
+            f"{len(files)} files, {len(changed)} changed or new "
+            f"({changed_bytes / 1048576:.1f} MB to chunk)"
+        )
+
+        new_bytes, stored_bytes, failed = self.chunk_files(
+            source, changed, entries, changed_bytes, report, not dry_run
+        )
+        for relative_path in failed:
+            del entries[relative_path]
+
+        seconds = max(time.monotonic() - started, 1e-6)
+        total_bytes = sum(entry["size"] for entry in entries.values())
+        report(
+            f"{'Would store' if dry_run else 'Stored'} {new_bytes / 1048576:.1f} MB of new data "
+            f"({stored_bytes / 1048576:.1f} MB compressed) for {total_bytes / 1048576:.1f} MB "
+            f"in {seconds:.1f}s"
+        )
+        report.progress(100)
+        if dry_run:
+            return None
+
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "source": source,
+            "created": time.time(),
+            "files": entries,
+            "directories": {
+                path: {"mode": stat.st_mode & 0o7777, "mtime": stat.st_mtime_ns}
+                for path, stat in directories.items()
+            },
+            "symlinks": symlinks,
+        }
+        name = self.save_snapshot(manifest)
+        report(f"Snapshot {name} written to {self.root}")
+        return name
+
+    def chunk_files(self, source, changed, entries, changed_bytes, report, write):
+        """
+        Chunks the changed files in a process pool and records their chunks in `entries`.
+
+        Returns:
+            tuple: (new_bytes, stored_bytes, failed), where failed lists the files that could
+            not be read.
+        """
+        new_bytes = stored_bytes = done_bytes = 0
+        failed = []
+        if not changed:
+            return new_bytes, stored_bytes, failed
+
+        base = source if os.path.isdir(source) else os.path.dirname(source)
+        batches = []
+        batch, batch_bytes = [], 0
+        # Largest files first, so a big file does not start last and hold up the run
+        for relative_path in sorted(changed, key=lambda path: -entries[path]["size"]):
+            batch.append(relative_path)
+            batch_bytes += entries[relative_path]["size"]
+            if batch_bytes >= BATCH_BYTES or len(batch) >= BATCH_FILES:
+                batches.append(batch)
+                batch, batch_bytes = [], 0
+        if batch:
+            batches.append(batch)
+
+        # Worker processes are spawned rather than forked: the caller runs alongside Qt and
+        # asyncio threads whose locks a forked child could inherit in a held state
+        context = multiprocessing.get_context("spawn")
+        cancelled = context.Event()
+        with ProcessPoolExecutor(
+            min(self.workers, len(batches)), mp_context=context, initializer=init_worker, initargs=(cancelled,)
+        ) as pool:
+            pending = {
+                pool.submit(store_files, self.root, [os.path.join(base, path) for path in batch], write): batch
+                for batch in batches
+            }
+            while pending:
+                finished, _ = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                if report.cancelled:
+                    cancelled.set()
+                    for future in pending:
+                        future.cancel()
+                    raise RuntimeError("Backup cancelled")
+                for future in finished:
+                    batch = pending.pop(future)
+                    for relative_path, (chunks, new, stored, error) in zip(batch, future.result()):
+                        done_bytes += entries[relative_path]["size"]
+                        if error is not None:
+                            report(f"Skipped {relative_path}: {error}")
+                            failed.append(relative_path)
+                            continue
+                        entries[relative_path]["chunks"] = chunks
+                        new_bytes += new
+                        stored_bytes += stored
+                if finished:
+                    report.progress(int(done_bytes * 99 / max(changed_bytes, 1)))
+        return new_bytes, stored_bytes, failed
+
+    def restore(self, name, target, report):
+        """
+        Restores a snapshot into a directory.
+
+        Files are created at their final size and filled through memory maps by a thread pool,
+        with large files split into ranges so they are restored in parallel as well. Chunk
+        decompression and hashing release the GIL, so the threads run concurrently.
+
+        Args:
+            name (str): The snapshot name.
+            target (str): The directory receiving the files.
+            report (JobReporter): Receives output lines and progress.
+
+        Raises:
+            ValueError: If the snapshot or one of its chunks is missing or corrupt.
+        """
+        started = time.monotonic()
+        manifest = self.load_snapshot(name)
+        os.makedirs(target, exist_ok=True)
+        for relative_path in sorted(manifest["directories"]):
+            os.makedirs(os.path.join(target, relative_path), exist_ok=True)
+
+        tasks = []
+        for relative_path, entry in manifest["files"].items():
+            path = os.path.join(target, relative_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if os.path.islink(path) or os.path.isfile(path):
+                os.remove(path)  # Never write through a link into another file
+            with open(path, "wb") as file:
+                file.truncate(entry["size"])
+            offset = 0
+            group, group_bytes, group_offset = [], 0, 0
+            for digest, length in entry["chunks"]:
+                group.append((digest, length))
+                group_bytes += length
+                offset += length
+                if group_bytes >= RESTORE_TASK_BYTES:
+                    tasks.append((path, entry["size"], group, group_offset))
+                    group, group_bytes, group_offset = [], 0, offset
+            if group:
+                tasks.append((path, entry["size"], group, group_offset))
+
+        total_bytes = max(sum(entry["size"] for entry in manifest["files"].values()), 1)
+        done_bytes = 0
+        with ThreadPoolExecutor(self.workers) as pool:
+            futures = [pool.submit(restore_range, self.root, *task) for task in tasks]
+            for future in futures:
+                done_bytes += future.result()
+                report.progress(int(done_bytes * 99 / total_bytes))
+
+        for relative_path, link_target in manifest["symlinks"].items():
+            path = os.path.join(target, relative_path)
+            if os.path.lexists(path):
+                os.remove(path)
+            os.symlink(link_target, path)
+        for relative_path, entry in manifest["files"].items():
+            path = os.path.join(target, relative_path)
+            os.chmod(path, entry["mode"])
+            os.utime(path, ns=(entry["mtime"], entry["mtime"]))
+        # Deepest first, since filling a directory changes its modification time
+        for relative_path in sorted(manifest["directories"], reverse=True):
+            entry = manifest["directories"][relative_path]
+            path = os.path.join(target, relative_path)
+            os.chmod(path, entry["mode"])
+            os.utime(path, ns=(entry["mtime"], entry["mtime"]))
+
+        seconds = max(time.monotonic() - started, 1e-6)
+        report(
+            f"Restored {len(manifest['files'])} files ({total_bytes / 1048576:.1f} MB) "
+            f"from snapshot {name} in {seconds:.1f}s"
+        )
+        report.progress(100)
+
+
+class ConsoleReport:
+    """
+    Reporter for command line use: prints output lines and ignores progress.
+    """
+    cancelled = False
+
+    def __call__(self, line):
+        print(line)
+
+    def progress(self, value):
+        pass
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) >= 4 and sys.argv[1] == "backup":
+        ChunkStore(sys.argv[3]).backup(sys.argv[2], ConsoleReport())
+    elif len(sys.argv) >= 5 and sys.argv[1] == "restore":
+        ChunkStore(sys.argv[2]).restore(sys.argv[3], sys.argv[4], ConsoleReport())
+    elif len(sys.argv) >= 3 and sys.argv[1] == "list":
+        for snapshot in ChunkStore(sys.argv[2]).list_snapshots():
+            print(snapshot)
+    else:
+        print("Usage: python chunk_store.py backup SOURCE STORE")
+        print("       python chunk_store.py restore STORE SNAPSHOT TARGET")
+        print("       python chunk_store.py list STORE")
+        sys.exit(1)
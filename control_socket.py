@@ -0,0 +1,375 @@
+"""
+Local control socket for submitting jobs to a running SyncMate instance.
+
+The running instance, GUI or headless, listens on a Unix domain socket and speaks
+newline-delimited JSON-RPC 2.0. Supported methods:
+
+    run_profile  {"profile": name, "watch": bool}       -> {"job": id}
+    run_job      {"settings": {...}, "watch": bool}     -> {"job": id}
+    cancel       {"job": id}                            -> {"cancelled": bool}
+    list_jobs    {}                                     -> [job, ...]
+    subscribe    {"job": id}                            -> streams events
+    ping         {}                                     -> {"pid": pid}
+
+With `"watch": true`, or after `subscribe`, runner events are streamed as `event`
+notifications until the job is done (or, for `subscribe` without a job, until the client
+disconnects). Command line usage:
+
+    python control_socket.py run_profile NAME [--watch]
+    python control_socket.py list_jobs
+    python control_socket.py cancel JOB_ID
+"""
+import asyncio
+import json
+import os
+import shutil
+import socket
+import sys
+import tempfile
+
+from async_runner import DONE_STATES
+
+EVENT_QUEUE_SIZE = 10000
+CONNECT_TIMEOUT = 2
+
+
+def default_socket_path():
+    """
+    Returns the per-user path of the control socket.
+    """
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, "syncmate.sock")
+    return os.path.join(tempfile.gettempdir(), f"syncmate-{os.getuid()}.sock")
+
+
+class RpcError(Exception):
+    """
+    Error reported to the client as a JSON-RPC error object.
+    """
+
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+class ControlServer:
+    """
+    Serves the control socket on the AsyncRunner's event loop.
+
+    Methods:
+        start():
+            Binds the socket; returns False if it cannot be served on this platform.
+
+        stop():
+            Closes the socket and removes its file.
+    """
+
+    def __init__(self, runner, profiles_dir, socket_path=None, extra_methods=None):
+        """
+        Initializes the ControlServer object.
+
+        Args:
+            runner (AsyncRunner): The runner that executes submitted jobs.
+            profiles_dir (str): Directory holding the saved profiles.
+            socket_path (str): Path of the socket; defaults to `default_socket_path()`.
+            extra_methods (dict): Additional method names mapped to callables taking the params.
+                They are called on the loop thread and must not block.
+        """
+        self.runner = runner
+        self.profiles_dir = profiles_dir
+        self.socket_path = socket_path or default_socket_path()
+        self.extra_methods = extra_methods or {}
+        self.server = None
+
+    def start(self):
+        """
+        Binds the socket and starts accepting connections.
+
+        Returns:
+            bool: False if Unix sockets are unavailable or another instance owns the socket.
+        """
+        if not hasattr(socket, "AF_UNIX"):
+            return False
+        if instance_running(self.socket_path):
+            return False
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)  # Left behind by an instance that did not shut down
+        self.runner.start()
+        future = asyncio.run_coroutine_threadsafe(self.listen(), self.runner.loop)
+        try:
+            future.result(timeout=5)
+        except OSError:
+            return False
+        return True
+
+    async def listen(self):
+        # Only the owner may connect. The socket is bound inside a private directory and
+        # restricted before it is moved into place, so it is never reachable with looser
+        # permissions.
+        private_dir = tempfile.mkdtemp(dir=os.path.dirname(self.socket_path) or None)
+        try:
+            bound_path = os.path.join(private_dir, "socket")
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                sock.bind(bound_path)
+                os.chmod(bound_path, 0o600)
+                os.replace(bound_path, self.socket_path)
+            except OSError:
+                sock.close()
+                raise
+            self.server = await asyncio.start_unix_server(self.handle_client, sock=sock)
+        finally:
+            shutil.rmtree(private_dir, ignore_errors=True)
+
+    def stop(self):
+        """
+        Closes the socket and removes its file.
+        """
+        if self.server is None:
+            return
+        if self.runner.loop is not None and self.runner.loop.is_running():
+            self.runner.loop.call_soon_threadsafe(self.server.close)
+        self.server = None
+        try:
+            os.remove(self.socket_path)
+        except OSError:
+            pass
+
+    async def handle_client(self, reader, writer):
+        """
+        Serves one client connection until it disconnects.
+        """
+        streams = {}  # Stream task -> its event queue
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                response, stream = self.dispatch(line)
+                if response is not None:
+                    writer.write(json.dumps(response).encode() + b"\n")
+                    await writer.drain()
+                if stream is not None:
+                    task = asyncio.ensure_future(self.stream_events(writer, *stream))
+                    streams[task] = stream[1]
+                    task.add_done_callback(streams.pop)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            # Nobody is left to read the events: stop the streams and drop their listeners,
+            # including those of streams cancelled before they started
+            for task, queue in list(streams.items()):
+                task.cancel()
+                self.runner.remove_listener(queue.listener)
+            if streams:
+                await asyncio.gather(*streams, return_exceptions=True)
+            writer.close()
+
+    def dispatch(self, line):
+        """
+        Executes one request.
+
+        Returns:
+            tuple: (response, stream), where stream is (job_id, queue) when events must be streamed.
+        """
+        request_id = None
+        try:
+            try:
+                request = json.loads(line)
+            except ValueError:
+                raise RpcError(-32700, "Parse error")
+            if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+                raise RpcError(-32600, "Invalid request")
+            request_id = request.get("id")
+            params = request.get("params") or {}
+            if not isinstance(params, dict):
+                raise RpcError(-32602, "Params must be an object")
+
+            stream = None
+            method = request["method"]
+            if method == "run_profile":
+                result = {"job": self.submit(self.load_profile(params.get("profile")), params.get("profile"))}
+            elif method == "run_job":
+                if not isinstance(params.get("settings"), dict):
+                    raise RpcError(-32602, "settings must be an object")
+                result = {"job": self.submit(params["settings"], params.get("name"))}
+            elif method == "cancel":
+                result = {"cancelled": self.runner.cancel(params.get("job"))}
+            elif method == "list_jobs":
+                result = self.runner.list_jobs()
+            elif method == "subscribe":
+                result = {"subscribed": params.get("job")}
+                stream = self.subscribe(params.get("job"))
+            elif method == "ping":
+                result = {"pid": os.getpid()}
+            elif method in self.extra_methods:
+                result = self.extra_methods[method](params)
+            else:
+                raise RpcError(-32601, f"Unknown method: {method}")
+
+            if method in ("run_profile", "run_job") and params.get("watch"):
+                stream = self.subscribe(result["job"])
+            response = {"jsonrpc": "2.0", "id": request_id, "result": result}
+            return (response if request_id is not None else None), stream
+        except RpcError as e:
+            return {"jsonrpc": "2.0", "id": request_id, "error": {"code": e.code, "message": e.message}}, None
+        except Exception as e:
+            return {"jsonrpc": "2.0", "id": request_id, "error": {"code": -32000, "message": str(e)}}, None
+
+    def load_profile(self, name):
+        """
+        Reads a saved profile.
+
+        Raises:
+            RpcError: If the name is invalid or the profile does not exist.
+        """
+        if not isinstance(name, str) or not name or os.path.basename(name) != name:
+            raise RpcError(-32602, "Invalid profile name")
+        profile_path = os.path.join(self.profiles_dir, f"{name}.json")
+        if not os.path.exists(profile_path):
+            raise RpcError(-32602, f"Profile '{name}' not found")
+        with open(profile_path, "r") as f:
+            return json.load(f)
+
+    def submit(self, settings, name=None):
+        """
+        Builds and queues the job for the given settings.
+
+        Returns:
+            int: The job identifier.
+        """
+        from sync_jobs import build_sync_job  # Clients of this module need none of the sync code
+
+        command, prepare = build_sync_job(self.runner, settings, self.profiles_dir)
+        return self.runner.submit(command, name=name, prepare=prepare)
+
+    def subscribe(self, job_id):
+        """
+        Registers a bounded event queue for one job, or all jobs when `job_id` is None.
+
+        Returns:
+            tuple: (job_id, queue)
+        """
+        queue = asyncio.Queue(maxsize=EVENT_QUEUE_SIZE)
+
+        def listener(event):
+            if job_id is None or event["job"] == job_id:
+                try:
+                    queue.put_nowait(event)
+                except asyncio.QueueFull:
+                    pass  # A slow client misses events rather than growing memory
+
+        queue.listener = listener
+        self.runner.add_listener(listener)
+        # The job may have finished before the subscription was registered
+        job = self.runner.get_job(job_id) if job_id is not None else None
+        if job is not None and job.state in DONE_STATES:
+            listener({"type": "state", "job": job.id, "state": job.state, "name": job.name,
+                      "returncode": job.returncode, "error": job.error})
+        return job_id, queue
+
+    async def stream_events(self, writer, job_id, queue):
+        """
+        Writes events as notifications until the job is done or the client disconnects.
+        """
+        try:
+            while not writer.is_closing():
+                event = await queue.get()
+                notification = {"jsonrpc": "2.0", "method": "event", "params": event}
+                writer.write(json.dumps(notification).encode() + b"\n")
+                await writer.drain()
+                if job_id is not None and event["type"] == "state" and event["state"] in DONE_STATES:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self.runner.remove_listener(queue.listener)
+
+
+def instance_running(socket_path=None):
+    """
+    Returns True if a SyncMate instance answers on the control socket.
+    """
+    try:
+        request(socket_path, "ping")
+    except (OSError, ValueError):
+        return False
+    return True
+
+
+def request(socket_path, method, params=None, on_event=None):
+    """
+    Sends one request to the running instance and returns its result.
+
+    Args:
+        socket_path (str): Path of the socket; defaults to `default_socket_path()`.
+        method (str): The method to call.
+        params (dict): The method parameters.
+        on_event (callable): Receives streamed events until a job is done, when the request
+            asks for them.
+
+    Raises:
+        OSError: If no instance is listening.
+        RuntimeError: If the instance reports an error.
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    client.settimeout(CONNECT_TIMEOUT)
+    try:
+        client.connect(socket_path or default_socket_path())
+        client.settimeout(None)
+        message = {"jsonrpc": "2.0", "id": 1, "method": method, "params": params or {}}
+        client.sendall(json.dumps(message).encode() + b"\n")
+        lines = client.makefile("r")
+        response = json.loads(lines.readline())
+        if "error" in response:
+            raise RuntimeError(response["error"]["message"])
+        if on_event is not None:
+            for line in lines:
+                event = json.loads(line)["params"]
+                on_event(event)
+                if event["type"] == "state" and event["state"] in DONE_STATES:
+                    break
+        return response["result"]
+    finally:
+        client.close()
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Control a running SyncMate instance.")
+    parser.add_argument("--socket", help="Path of the control socket")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run_profile")
+    run.add_argument("profile")
+    run.add_argument("--watch", action="store_true")
+    commands.add_parser("list_jobs")
+    cancel = commands.add_parser("cancel")
+    cancel.add_argument("job", type=int)
+    args = parser.parse_args(argv)
+
+    def show(event):
+        print(event.get("line") or json.dumps(event))
+
+    try:
+        if args.command == "run_profile":
+            result = request(args.socket, "run_profile", {"profile": args.profile, "watch": args.watch},
+                             show if args.watch else None)
+        elif args.command == "cancel":
+            result = request(args.socket, "cancel", {"job": args.job})
+        else:
+            result = request(args.socket, "list_jobs")
+    except OSError:
+        print("No running SyncMate instance found.", file=sys.stderr)
+        return 1
+    except RuntimeError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Stand-in for the rsync executable that produces scripted output without transferring data.
+
+Point SyncMate at it with `SYNCMATE_RSYNC=/path/to/fake_rsync.py`. The command line is
+accepted and ignored; the output is controlled with environment variables:
+
+    SYNCMATE_FAKE_REPLAY      Path of recorded rsync output to replay instead of synthetic output.
+    SYNCMATE_FAKE_FILES       Number of files in the synthetic file list (default 1000).
+    SYNCMATE_FAKE_UPDATES     Number of `\\r` progress updates per file (default 3).
+    SYNCMATE_FAKE_MALFORMED   Fraction of files followed by a malformed line (default 0).
+    SYNCMATE_FAKE_RATE        Maximum lines per second, 0 for unlimited (default 0).
+    SYNCMATE_FAKE_TIMESTAMPS  When set to 1, file lines end with `@<monotonic time>` so a harness
+                              can measure delivery latency.
+    SYNCMATE_FAKE_EXIT        Exit code to finish with (default 0).
+"""
+import os
+import random
+import sys
+import time
+
+BATCH_LINES = 256
+MALFORMED_LINES = [
+    b"(xfr#1, to-chk=abc/def)",
+    b"(xfr#1, to-chk=12",
+    b"to-check=/",
+    b"\xff\xfe\xfd invalid utf-8 \xc3\x28",
+    b"rsync: [sender] send_files failed to open \"missing\": No such file or directory (2)",
+    b"x" * 100000,
+]
+
+
+def synthetic_output(files, updates, malformed, timestamps):
+    """
+    Yields synthetic `rsync --progress` output, one line or progress burst at a time.
+
+    Args:
+        files (int): Number of files in the file list.
+        updates (int): Number of intermediate progress updates per file.
+        malformed (float): Fraction of files followed by a malformed line.
+        timestamps (bool): Whether file lines carry their emission time.
+    """
+    rng = random.Random(files)
+    yield b"sending incremental file list\n"
+    for index in range(1, files + 1):
+        name = f"dir{index % 100:02d}/file{index:08d}.dat"
+        if timestamps:
+            name += f" @{time.monotonic():.6f}"
+        yield name.encode() + b"\n"
+
+        size = 1024 * (index % 97 + 1)
+        burst = []
+        for step in range(1, updates + 1):
+            done = size * step // (updates + 1)
+            burst.append(f"{done:>15,} {done * 100 // size:>3}%   10.00MB/s    0:00:00".encode())
+        burst.append(
+            f"{size:>15,} 100%   10.00MB/s    0:00:00 (xfr#{index}, to-chk={files - index}/{files})".encode()
+        )
+        yield b"\r".join(burst) + b"\n"
+
+        if malformed and rng.random() < malformed:
+            yield rng.choice(MALFORMED_LINES) + b"\n"
+
+    yield b"\nsent 1,024 bytes  received 35 bytes  2,118.00 bytes/sec\n"
+    yield b"total size is 1,024  speedup is 0.97\n"
+
+
+def replay_output(path):
+    """
+    Yields the lines of a recorded rsync output file, keeping `\\r` characters.
+    """
+    with open(path, "rb") as recording:
+        for line in recording:
+            yield line
+
+
+def main():
+    replay = os.environ.get("SYNCMATE_FAKE_REPLAY")
+    if replay:
+        lines = replay_output(replay)
+    else:
+        lines = synthetic_output(
+            int(os.environ.get("SYNCMATE_FAKE_FILES", "1000")),
+            int(os.environ.get("SYNCMATE_FAKE_UPDATES", "3")),
+            float(os.environ.get("SYNCMATE_FAKE_MALFORMED", "0")),
+            os.environ.get("SYNCMATE_FAKE_TIMESTAMPS") == "1",
+        )
+    rate = float(os.environ.get("SYNCMATE_FAKE_RATE", "0"))
+
+    out = sys.stdout.buffer
+    batch = []
+    start = time.monotonic()
+    written = 0
+    try:
+        for line in lines:
+            batch.append(line)
+            if len(batch) < BATCH_LINES and not rate:
+                continue
+            out.write(b"".join(batch))
+            out.flush()
+            written += len(batch)
+            batch = []
+            if rate:
+                delay = start + written / rate - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+        out.write(b"".join(batch))
+        out.flush()
+    except BrokenPipeError:
+        return 141
+    return int(os.environ.get("SYNCMATE_FAKE_EXIT", "0"))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,312 @@
+import os
+import shlex
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from path_utils import is_remote_destination, seed_target
+from rsync_manager import RsyncThread
+from rsync_options import rsync_executable
+
+# Options that only shape the network transfer and have no meaning when replaying a batch
+BATCH_SKIPPED_OPTIONS = {"--compress", "--progress"}
+BATCH_SKIPPED_VALUE_OPTIONS = {"--bwlimit"}
+
+
+def comparison_options(options):
+    """
+    Returns the rsync options that compare a mirror with the reference destination.
+
+    The comparison is a dry run that itemizes every difference, honoring the exclude
+    patterns and deletion setting of the sync itself.
+
+    Args:
+        options (list): The rsync executable followed by the options of the sync.
+    """
+    compare = [rsync_executable(), "-a", "--dry-run", "--itemize-changes"]
+    if "--delete" in options:
+        compare.append("--delete")
+    for index, option in enumerate(options[:-1]):
+        if option == "--exclude":
+            compare.extend(["--exclude", options[index + 1]])
+    return compare
+
+
+def batch_replay_options(options):
+    """
+    Filters an rsync command line down to the options that apply when replaying a batch.
+
+    Args:
+        options (list): The rsync executable followed by the options used to write the batch.
+
+    Returns:
+        list: The options to combine with `--read-batch`.
+    """
+    replay = []
+    skip_next = False
+    for option in options:
+        if skip_next:
+            skip_next = False
+            continue
+        if option in BATCH_SKIPPED_VALUE_OPTIONS:
+            skip_next = True
+            continue
+        if option in BATCH_SKIPPED_OPTIONS:
+            continue
+        replay.append(option)
+    return replay
+
+
+class FanoutRsyncThread(RsyncThread):
+    """
+    Thread that synchronizes one source to several destinations while reading the source only once.
+
+    The delta is computed against the first (reference) destination with `--write-batch`, and the
+    resulting batch file is then replayed with `--read-batch` on the remaining destinations in
+    parallel. A batch only describes the changes to the reference, so before the reference is
+    updated every other destination is compared with it. Destinations that have diverged, whose
+    replay fails, or that cannot be compared fall back to a normal rsync from the source, as do
+    all of them when the reference pass itself fails.
+
+    Methods:
+        __init__(options, source, destinations, max_workers):
+            Initializes the thread with the rsync options, the source and the destination list.
+
+        run():
+            Writes the batch against the reference destination and replays it on the others.
+    """
+
+    def __init__(self, options, source, destinations, max_workers=4):
+        """
+        Initializes the FanoutRsyncThread object.
+
+        Args:
+            options (list): The rsync executable followed by its options, without paths.
+            source (str): The source path.
+            destinations (list): The destinations; the first one is used as the reference.
+            max_workers (int): Maximum number of destinations updated concurrently.
+        """
+        super().__init__(options + [source, destinations[0]])
+        self.options = options
+        self.source = source
+        self.destinations = destinations
+        self.max_workers = max_workers
+        self.replay_processes = []
+        self.lock = threading.Lock()
+        self.completed = 0
+
+    def run(self):
+        """
+        Writes the batch against the reference destination and replays it on the others,
+        emitting the combined progress across all destinations.
+        """
+        batch_dir = tempfile.mkdtemp(prefix="syncmate-batch-")
+        batch_file = os.path.join(batch_dir, "batch")
+        try:
+            # A dry run writes no data, so there is nothing worth batching
+            if "--dry-run" in self.options:
+                failures = [dest for dest in self.destinations if not self.sync_directly(dest)]
+            else:
+                reference = self.destinations[0]
+                mirrors = self.destinations[1:]
+                # The comparison must see the reference as it was before this run updates it
+                with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                    in_step = dict(zip(mirrors, pool.map(self.matches_reference, mirrors)))
+
+                self.output_signal.emit(f"Computing delta against {reference}")
+                reference_command = self.options + [f"--write-batch={batch_file}", self.source, reference]
+                returncode = self.run_command(reference_command, self.destination_progress)
+                if not self.is_running:
+                    self.error_signal.emit("Rsync operation cancelled")
+                    return
+                failures = []
+                if returncode == 0:
+                    self.destination_done()
+                else:
+                    self.output_signal.emit(
+                        f"[{reference}] Rsync exited with code {returncode}, "
+                        "syncing the other destinations directly"
+                    )
+                    failures.append(reference)
+
+                def update(dest):
+                    if returncode == 0 and in_step[dest]:
+                        return self.replay_batch(batch_file, dest)
+                    return self.sync_directly(dest)
+
+                with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                    results = list(pool.map(update, mirrors))
+                failures += [dest for dest, ok in zip(mirrors, results) if not ok]
+
+            if not self.is_running:
+                self.error_signal.emit("Rsync operation cancelled")
+            elif failures:
+                self.error_signal.emit(f"Rsync failed for: {', '.join(failures)}")
+            else:
+                self.finished_signal.emit(True)
+        except Exception as e:
+            self.error_signal.emit(str(e))
+        finally:
+            shutil.rmtree(batch_dir, ignore_errors=True)
+
+    def matches_reference(self, dest):
+        """
+        Checks that a destination holds the same files as the reference destination.
+
+        Args:
+            dest (str): The destination to compare.
+
+        Returns:
+            bool: True if the batch can be replayed on it; False if it has diverged or cannot
+            be compared, which is the case when both destinations are remote.
+        """
+        reference = self.destinations[0]
+        if is_remote_destination(reference) and is_remote_destination(dest):
+            return False
+        # Compare the trees the sync writes to, which are below the destinations when the
+        # source has no trailing slash
+        command = comparison_options(self.options) + [
+            os.path.join(seed_target(self.source, reference), ""),
+            os.path.join(seed_target(self.source, dest), ""),
+        ]
+        process = self.start_process(command, stderr=subprocess.DEVNULL)
+        if process is None:
+            return False
+        # The attributes of the compared root itself are not part of the replayed tree
+        differences = [
+            line for line in process.stdout
+            if line.strip() and not (line.startswith(".d") and line.split(None, 1)[-1].strip() == "./")
+        ]
+        process.wait()
+        if process.returncode != 0:
+            self.output_signal.emit(f"[{dest}] Could not be compared with {reference}, it will be synced directly")
+            return False
+        if differences:
+            self.output_signal.emit(
+                f"[{dest}] Differs from {reference} in {len(differences)} entries, it will be synced directly"
+            )
+            return False
+        return True
+
+    def replay_batch(self, batch_file, dest):
+        """
+        Applies the batch file to a destination, falling back to a normal sync on failure.
+
+        Args:
+            batch_file (str): Path of the batch written against the reference destination.
+            dest (str): The destination to update.
+
+        Returns:
+            bool: True if the destination is up to date.
+        """
+        if not self.is_running:
+            return False
+
+        replay = batch_replay_options(self.options)
+        if is_remote_destination(dest):
+            # The batch is streamed to an rsync running on the remote host
+            host, path = dest.split(":", 1)
+            remote_replay = ["rsync"] + replay[1:]
+            command = ["ssh", host, shlex.join(remote_replay + ["--read-batch=-", path or "."])]
+        else:
+            command = replay + [f"--read-batch={batch_file}", dest]
+
+        with open(batch_file, "rb") as batch:
+            process = self.start_process(
+                command, stdin=batch if is_remote_destination(dest) else subprocess.DEVNULL
+            )
+            if process is None:
+                return False
+            for line in process.stdout:
+                self.output_signal.emit(f"[{dest}] {line.strip()}")
+            process.wait()
+
+        if process.returncode == 0:
+            self.output_signal.emit(f"[{dest}] Batch applied")
+            self.destination_done()
+            return True
+        if not self.is_running:
+            return False
+
+        self.output_signal.emit(
+            f"[{dest}] Batch replay failed with code {process.returncode}, falling back to a full sync"
+        )
+        return self.sync_directly(dest)
+
+    def sync_directly(self, dest):
+        """
+        Runs a normal rsync from the source to a single destination.
+
+        Args:
+            dest (str): The destination to update.
+
+        Returns:
+            bool: True if rsync succeeded.
+        """
+        process = self.start_process(self.options + [self.source, dest])
+        if process is None:
+            return False
+        for line in process.stdout:
+            self.output_signal.emit(f"[{dest}] {line.strip()}")
+        process.wait()
+        if process.returncode == 0:
+            self.destination_done()
+        return process.returncode == 0
+
+    def start_process(self, command, stdin=subprocess.DEVNULL, stderr=subprocess.STDOUT):
+        """
+        Starts a command whose output is read line by line, unless the sync has been cancelled.
+
+        The check and the registration happen under the lock that `stop` takes, so a process
+        started just as the sync is cancelled is still terminated.
+
+        Args:
+            command (list): The command to run.
+            stdin: Standard input of the process.
+            stderr: Where the process writes its errors.
+
+        Returns:
+            subprocess.Popen: The process, or None if the sync has been cancelled.
+        """
+        with self.lock:
+            if not self.is_running:
+                return None
+            process = subprocess.Popen(
+                command,
+                stdin=stdin,
+                stdout=subprocess.PIPE,
+                stderr=stderr,
+                universal_newlines=True,
+            )
+            self.replay_processes.append(process)
+        return process
+
+    def destination_progress(self, value):
+        """
+        Scales the progress of the reference pass to its share of the whole fan-out.
+
+        Args:
+            value (int): Progress percentage of the reference pass.
+        """
+        self.progress_signal.emit(int(value / len(self.destinations)))
+
+    def destination_done(self):
+        """
+        Records a completed destination and emits the overall progress.
+        """
+        with self.lock:
+            self.completed += 1
+            progress = int(self.completed * 100 / len(self.destinations))
+        self.progress_signal.emit(progress)
+
+    def stop(self):
+        """
+        Terminates the reference rsync and every replay still running.
+        """
+        super().stop()
+        with self.lock:
+            for process in self.replay_processes:
+                if process.poll() is None:
+                    process.terminate()
@@ -5,8 +5,8 @@ import json
 import threading
 import time
 import schedule
-from PySide6.QtCore import Qt, QSize, QDateTime
-from PySide6.QtGui import QIcon, QPixmap, QFontDatabase, QFont
+from PySide6.QtCore import Qt, QSize, QDateTime, QThread, QTimer, Signal
+from PySide6.QtGui import QAction, QIcon, QPixmap, QFontDatabase, QFont
 from PySide6.QtWidgets import (
     QApplication,
     QFileDialog,
@@ -22,8 +22,7 @@ from PySide6.QtWidgets import (
     QSizePolicy,
     QCheckBox,
     QDialog,
-    QTextEdit,
-    QProgressBar,
+    QMenu,
     QSpinBox,
     QInputDialog,
     QSystemTrayIcon,
@@ -32,7 +31,15 @@ from PySide6.QtWidgets import (
 )
 
 
-from rsync_manager import RsyncThread
+from rsync_options import build_rsync_options, rsync_executable, split_destinations
+from fanout_manager import FanoutRsyncThread
+from seed_manager import SeedThread, destination_is_empty
+from runner_bridge import RunnerBridge
+from control_socket import ControlServer
+from sync_jobs import build_sync_job
+from chunk_store import CHUNK_STORE
+from output_dialog import OutputDialog
+from process_stats import rss_bytes
 
 
 class SyncMateGUI(QWidget):
@@ -48,10 +55,20 @@ class SyncMateGUI(QWidget):
 
     load_profiles():
         Loads the available profiles from the "profiles" directory and populates the profile dropdown menu.
-    """
 
-    def __init__(self):
+    In tray mode the window starts hidden, closing it only hides it, and scheduled runs report
+    through tray notifications instead of dialogs, so the application can run for weeks.
+    """
+    # Emitted by the scheduler thread so that scheduled runs start on the GUI thread
+    scheduled_task_due = Signal(object)
+    # Emitted by the control socket, whose requests are served on the runner's loop thread
+    show_requested = Signal()
+    # Emitted by the worker thread that checks whether the destination is empty
+    destination_checked = Signal(object, bool)
+
+    def __init__(self, tray_mode=False):
         super().__init__()
+        self.tray_mode = tray_mode
 
         # Add profiles directory, if it doesn't exist then create it
         self.profiles_dir = os.path.join(os.path.dirname(__file__), "profiles")
@@ -60,12 +77,10 @@ class SyncMateGUI(QWidget):
         
         # Scheduler thread
         self.scheduled_tasks = []
+        self.scheduled_task_due.connect(self.execute_scheduled_task)
         self.scheduler_thread = threading.Thread(target=self.run_scheduler, daemon=True)
         self.scheduler_thread.start()
 
-        self.load_scheduled_tasks()
-
-
         # Check if system tray is available
         if not QSystemTrayIcon.isSystemTrayAvailable():
             QMessageBox.critical(
@@ -75,16 +90,40 @@ class SyncMateGUI(QWidget):
 
         self.tray_icon = QSystemTrayIcon(self)
         self.tray_icon.setIcon(QIcon("resources/sync.svg"))
+        self.tray_icon.activated.connect(self.tray_activated)
+
+        self.tray_menu = QMenu(self)
+        show_action = QAction("Show SyncMate", self.tray_menu)
+        show_action.triggered.connect(self.show_window)
+        output_action = QAction("Show Last Output", self.tray_menu)
+        output_action.triggered.connect(lambda: self.output_dialog.show())
+        quit_action = QAction("Quit", self.tray_menu)
+        quit_action.triggered.connect(QApplication.instance().quit)
+        self.tray_menu.addAction(show_action)
+        self.tray_menu.addAction(output_action)
+        self.tray_menu.addAction(quit_action)
+        self.tray_icon.setContextMenu(self.tray_menu)
         self.tray_icon.show()
 
+        # Rsync jobs run on a shared asyncio event loop instead of a thread each
+        self.runner_bridge = RunnerBridge(self)
+
+        # Lets other processes submit jobs to this instance through a local socket
+        self.show_requested.connect(self.show_window)
+        self.destination_checked.connect(self.destination_check_finished)
+        self.control_server = ControlServer(
+            self.runner_bridge.runner,
+            self.profiles_dir,
+            extra_methods={"show": self.request_show},
+        )
+        self.control_server.start()
 
+        # A single output dialog is reused by every run
+        self.output_dialog = OutputDialog(self)
+        self.output_dialog.cancel_requested.connect(self.cancel_rsync)
+        self.rsync_thread = None
 
         # Load custom font
-        self.cancel_button = None
-        self.progress_bar = None
-        self.output_text = None
-        self.output_dialog = None
-        self.rsync_thread = None
         source_sans_reg_path = os.path.join(
             os.path.dirname(__file__), "resources", "SourceSansPro-Regular.otf"
         )
@@ -119,6 +158,12 @@ class SyncMateGUI(QWidget):
         self.dest_input.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
         self.dest_input.setObjectName("dest_input")
 
+        # Additional destinations receive the same changes as the main destination
+        self.extra_dest_input = QLineEdit(self)
+        self.extra_dest_input.setPlaceholderText("Additional destinations (comma-separated)")
+        self.extra_dest_input.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Fixed)
+        self.extra_dest_input.setObjectName("extra_dest_input")
+
         # Rsync options
         self.dry_run_checkbox = QCheckBox("--dry-run", self)
         self.dry_run_checkbox.setObjectName("dry_run_checkbox")
@@ -128,6 +173,10 @@ class SyncMateGUI(QWidget):
         self.compress_checkbox.setObjectName("compress_checkbox")
         self.verbose_checkbox = QCheckBox("--verbose", self)
         self.verbose_checkbox.setObjectName("verbose_checkbox")
+        self.detect_moves_checkbox = QCheckBox("Detect moves", self)
+        self.detect_moves_checkbox.setObjectName("detect_moves_checkbox")
+        self.multipass_checkbox = QCheckBox("Multi-pass", self)
+        self.multipass_checkbox.setObjectName("multipass_checkbox")
 
         # Exclude patterns
         self.exclude_label = QLabel("Exclude Patterns (comma-separated):", self)
@@ -168,6 +217,17 @@ class SyncMateGUI(QWidget):
         self.tasks_list = QListWidget(self)
         self.tasks_list.setObjectName("tasks_list")
 
+        self.load_scheduled_tasks()
+
+        # Memory usage readout
+        self.memory_label = QLabel(self)
+        self.memory_label.setObjectName("memory_label")
+        self.memory_label.setAlignment(Qt.AlignCenter)
+        self.memory_timer = QTimer(self)
+        self.memory_timer.timeout.connect(self.update_memory_usage)
+        self.memory_timer.start(5000)
+        self.update_memory_usage()
+
         # Bandwidth limit
         self.bwlimit_label = QLabel("Bandwidth Limit (KB/s):", self)
         self.bwlimit_label.setObjectName("bwlimit_label")
@@ -184,7 +244,7 @@ class SyncMateGUI(QWidget):
         self.source_type.setObjectName("source_type")
 
         self.dest_type = QComboBox(self)
-        self.dest_type.addItems(["Directory", "File"])
+        self.dest_type.addItems(["Directory", "File", CHUNK_STORE])
         self.dest_type.setObjectName("dest_type")
 
         # Buttons
@@ -194,7 +254,7 @@ class SyncMateGUI(QWidget):
         # Set sync.svg icon with specified size
         self.sync_button.setIcon(QIcon("resources/sync.svg"))
         self.sync_button.setIconSize(QSize(30, 30))
-        self.sync_button.clicked.connect(self.start_sync)
+        self.sync_button.clicked.connect(lambda: self.start_sync())
 
         self.source_browse_btn = QPushButton("Browse", self)
         self.source_browse_btn.setIcon(
@@ -235,6 +295,9 @@ class SyncMateGUI(QWidget):
         grid_layout.addWidget(self.dest_type, 2, 1)
         grid_layout.addWidget(self.dest_browse_btn, 2, 2)
 
+        # Additional destinations row (row 3)
+        grid_layout.addWidget(self.extra_dest_input, 3, 0, 1, 3)
+
         # Set column stretch to make input fields expand
         grid_layout.setColumnStretch(0, 1)  # Input field column
         grid_layout.setColumnStretch(1, 0)  # Type dropdown column
@@ -249,6 +312,8 @@ class SyncMateGUI(QWidget):
         top_checkboxes_layout.addWidget(self.delete_checkbox)
         top_checkboxes_layout.addWidget(self.compress_checkbox)
         top_checkboxes_layout.addWidget(self.verbose_checkbox)
+        top_checkboxes_layout.addWidget(self.detect_moves_checkbox)
+        top_checkboxes_layout.addWidget(self.multipass_checkbox)
         top_checkboxes_layout.setAlignment(Qt.AlignCenter)
 
         # Profile Layout
@@ -281,12 +346,13 @@ class SyncMateGUI(QWidget):
         options_layout.addWidget(self.bwlimit_input, 3, 1, 1, 1, Qt.AlignLeft)
 
         # Add options layout to main layout
-        grid_layout.addLayout(options_layout, 3, 0, 1, 3)
+        grid_layout.addLayout(options_layout, 4, 0, 1, 3)
 
         # Add grid layout to main layout
         main_layout.addWidget(self.sync_button, alignment=Qt.AlignCenter)
 
         main_layout.addLayout(grid_layout)
+        main_layout.addWidget(self.memory_label)
 
         self.setLayout(main_layout)
 
@@ -325,7 +391,7 @@ class SyncMateGUI(QWidget):
                 self.scheduled_tasks = json.load(file)
                 for task in self.scheduled_tasks:
                     run_time = QDateTime.fromString(task['time'], Qt.ISODate).toPyDateTime()
-                    schedule.every().day.at(run_time.strftime('%H:%M:%S')).do(self.execute_scheduled_task, task['profile']).tag(task['name'])
+                    schedule.every().day.at(run_time.strftime('%H:%M:%S')).do(self.scheduled_task_due.emit, task['profile']).tag(task['name'])
                     self.tasks_list.addItem(task['name'])
 
     def open_schedule_dialog(self):
@@ -376,7 +442,7 @@ class SyncMateGUI(QWidget):
 
         # Schedule the task
         schedule_time_str = run_time.strftime('%Y-%m-%d %H:%M:%S')
-        schedule.every().day.at(run_time.strftime('%H:%M:%S')).do(self.execute_scheduled_task, profile_data).tag(profile_name)
+        schedule.every().day.at(run_time.strftime('%H:%M:%S')).do(self.scheduled_task_due.emit, profile_data).tag(profile_name)
         QMessageBox.information(self, "Task Scheduled", f"Sync scheduled for {schedule_time_str}.")
 
         # Save the scheduled tasks to a file
@@ -394,6 +460,9 @@ class SyncMateGUI(QWidget):
             'verbose': self.verbose_checkbox.isChecked(),
             'exclude_patterns': self.exclude_input.text(),
             'bwlimit': self.bwlimit_input.value(),
+            'extra_destinations': self.extra_dest_input.text(),
+            'detect_moves': self.detect_moves_checkbox.isChecked(),
+            'multipass': self.multipass_checkbox.isChecked(),
         }
 
     def execute_scheduled_task(self, profile_data):
@@ -408,9 +477,12 @@ class SyncMateGUI(QWidget):
         self.verbose_checkbox.setChecked(profile_data.get('verbose', False))
         self.exclude_input.setText(profile_data.get('exclude_patterns', ''))
         self.bwlimit_input.setValue(profile_data.get('bwlimit', 0))
+        self.extra_dest_input.setText(profile_data.get('extra_destinations', ''))
+        self.detect_moves_checkbox.setChecked(profile_data.get('detect_moves', False))
+        self.multipass_checkbox.setChecked(profile_data.get('multipass', False))
 
-        # Start sync
-        self.start_sync()
+        # Start sync without asking questions, nobody may be watching
+        self.start_sync(interactive=False)
 
     def load_profiles(self):
         """
@@ -448,6 +520,9 @@ class SyncMateGUI(QWidget):
                 "verbose": self.verbose_checkbox.isChecked(),
                 "exclude_patterns": self.exclude_input.text(),
                 "bwlimit": self.bwlimit_input.value(),
+                "extra_destinations": self.extra_dest_input.text(),
+                "detect_moves": self.detect_moves_checkbox.isChecked(),
+                "multipass": self.multipass_checkbox.isChecked(),
             }
             profile_path = os.path.join(self.profiles_dir, f"{profile_name}.json")
             with open(profile_path, "w") as f:
@@ -487,6 +562,9 @@ class SyncMateGUI(QWidget):
                     self.verbose_checkbox.setChecked(profile_data.get("verbose", False))
                     self.exclude_input.setText(profile_data.get("exclude_patterns", ""))
                     self.bwlimit_input.setValue(profile_data.get("bwlimit", 0))
+                    self.extra_dest_input.setText(profile_data.get("extra_destinations", ""))
+                    self.detect_moves_checkbox.setChecked(profile_data.get("detect_moves", False))
+                    self.multipass_checkbox.setChecked(profile_data.get("multipass", False))
                     QMessageBox.information(
                         self,
                         "Profile Loaded",
@@ -547,7 +625,7 @@ class SyncMateGUI(QWidget):
 
         :return: None
         """
-        if self.dest_type.currentText() == "Directory":
+        if self.dest_type.currentText() != "File":
             dir_name = QFileDialog.getExistingDirectory(
                 self, "Select Destination Directory"
             )
@@ -558,7 +636,20 @@ class SyncMateGUI(QWidget):
             if file_name:
                 self.dest_input.setText(file_name)
 
-    def validate_paths(self):
+    def show_warning(self, message, interactive=True):
+        """
+        Shows a warning in a message box, or as a tray notification for unattended runs.
+
+        :param message: The warning to show.
+        :param interactive: Whether a user is waiting for the answer.
+        :return: None
+        """
+        if interactive:
+            QMessageBox.warning(self, "Warning", message)
+        else:
+            self.tray_icon.showMessage("SyncMate", message, QSystemTrayIcon.Warning, 5000)
+
+    def validate_paths(self, interactive=True):
         """
         Validates the selected source and destination paths.
 
@@ -566,6 +657,7 @@ class SyncMateGUI(QWidget):
         the existence of the specified source path based on the selected source type
         (either Directory or File).
 
+        :param interactive: Whether warnings are shown in message boxes or tray notifications.
         :return:
             - True if both paths are valid and the source path exists.
             - False otherwise and displays an appropriate warning message.
@@ -574,19 +666,17 @@ class SyncMateGUI(QWidget):
         dest = self.dest_input.text()
 
         if not source or not dest:
-            QMessageBox.warning(
-                self, "Warning", "Please select both a source and destination path."
-            )
+            self.show_warning("Please select both a source and destination path.", interactive)
             return False
         if self.source_type.currentText() == "Directory" and not os.path.isdir(source):
-            QMessageBox.warning(self, "Warning", "Source path does not exist.")
+            self.show_warning("Source path does not exist.", interactive)
             return False
         if self.source_type.currentText() == "File" and not os.path.isfile(source):
-            QMessageBox.warning(self, "Warning", "Source file does not exist.")
+            self.show_warning("Source file does not exist.", interactive)
             return False
         return True
 
-    def start_sync(self):
+    def start_sync(self, interactive=True):
         """
         Initiates the synchronization process using `rsync`. This method performs
         the following steps:
@@ -595,57 +685,35 @@ class SyncMateGUI(QWidget):
         2. Validates the source and destination paths.
         3. Constructs the `rsync` command with appropriate options based on user inputs.
         4. Confirms with the user if the `--delete` option is selected.
-        5. Executes the `rsync` command in a separate thread.
+        5. Executes the `rsync` command in a separate thread. When additional destinations
+           are configured, the source is read once and the delta is fanned out to all of them.
+           When the destination is empty, offers to seed it with parallel tar streams first.
+           When move detection is enabled, relocated files are moved on the destination
+           before rsync runs so they are not transferred again. In multi-pass mode the files
+           are split by class and each class is synced with its own tuned rsync flags.
+           A chunk store destination is backed up as a deduplicated snapshot instead.
 
+        Unattended (scheduled) runs skip the confirmations and report through the tray.
+
+        :param interactive: Whether a user started the sync and can answer questions.
         :return: None if prerequisites are not met or user cancels deletion confirmation.
         """
-        if shutil.which("rsync") is None:
-            QMessageBox.critical(
-                self, "Error", "Rsync is not installed or not found in PATH."
-            )
+        chunk_store = self.dest_type.currentText() == CHUNK_STORE
+        if not chunk_store and shutil.which(rsync_executable()) is None:
+            if interactive:
+                QMessageBox.critical(
+                    self, "Error", "Rsync is not installed or not found in PATH."
+                )
+            else:
+                self.show_warning("Rsync is not installed or not found in PATH.", interactive)
             return
-        if not self.validate_paths():
+        if not self.validate_paths(interactive):
             return
 
-        source = self.source_input.text()
-        dest = self.dest_input.text()
-
-        # Build the rsync command based on the selected options
-        rsync_command = ["rsync", "-a"]  # '-a' is for archive mode
-
-        # Bandwidth limit
-        bwlimit_value = self.bwlimit_input.value()
-        if bwlimit_value > 0:
-            rsync_command.extend(["--bwlimit", str(bwlimit_value)])
-
-        # Handle file or directory
-        if self.source_type.currentText() == "File":
-            rsync_command.remove("-a")  # Remove '-a' option for files
-            rsync_command.append("-r")  # Recursively copy
-
-        # Add options based on the selected checkboxes
-        if self.dry_run_checkbox.isChecked():
-            rsync_command.append("--dry-run")
-        if self.delete_checkbox.isChecked():
-            rsync_command.append("--delete")
-        if self.compress_checkbox.isChecked():
-            rsync_command.append("--compress")
-        if self.verbose_checkbox.isChecked():
-            rsync_command.append("--verbose")
-            rsync_command.append("--progress")  # Add progress for verbose mode
-
-        # Handle exclude patterns
-        exclude_patterns = self.exclude_input.text()
-        if exclude_patterns:
-            patterns = [pattern.strip() for pattern in exclude_patterns.split(",")]
-
-            for pattern in patterns:
-                rsync_command.extend(["--exclude", pattern])
-
-        rsync_command.extend([source, dest])
+        settings = self.get_current_settings()
 
         # Confirm if '--delete' option is selected
-        if self.delete_checkbox.isChecked():
+        if interactive and self.delete_checkbox.isChecked() and not chunk_store:
             reply = QMessageBox.question(
                 self,
                 "Warning",
@@ -656,41 +724,135 @@ class SyncMateGUI(QWidget):
                 return
 
         # Run rsync in separate thread
-        self.run_rsync_thread(rsync_command)
+        if chunk_store:
+            self.run_rsync_thread(self.create_sync_job(settings), interactive)
+        elif interactive and self.seeding_possible(settings):
+            # Checking a remote destination takes an ssh round trip, so it runs off the GUI thread
+            self.sync_button.setEnabled(False)
+            threading.Thread(target=self.check_destination, args=(settings,), daemon=True).start()
+        else:
+            self.dispatch_sync(settings, interactive)
 
-    def run_rsync_thread(self, command):
+    def check_destination(self, settings):
         """
-        :param command: The rsync command to execute in the thread.
+        Checks in a worker thread whether the destination is empty and reports the result
+        through `destination_checked`.
+
+        :param settings: The current settings as returned by `get_current_settings`.
+        :return: None
+        """
+        self.destination_checked.emit(settings, destination_is_empty(settings['destination']))
+
+    def destination_check_finished(self, settings, empty):
+        """
+        Continues an interactive sync once the destination has been checked, offering the
+        seeding mode if it is empty.
+
+        :param settings: The settings the sync was started with.
+        :param empty: Whether the destination is empty.
         :return: None
         """
-        # Create an instance of the Rsync Thread
-        self.rsync_thread = RsyncThread(command)
-        self.rsync_thread.output_signal.connect(self.update_output)
-        self.rsync_thread.progress_signal.connect(self.update_progress)
-        self.rsync_thread.error_signal.connect(self.rsync_error)
-        self.rsync_thread.finished_signal.connect(self.rsync_finished)
+        self.sync_button.setEnabled(True)
+        self.dispatch_sync(settings, True, seed=empty and self.offer_seeding())
 
-        # Create output dialog
-        self.output_dialog = QDialog(self)
-        self.output_dialog.setWindowTitle("Rsync Output")
-        dialog_layout = QVBoxLayout()
-        self.output_dialog.setLayout(dialog_layout)
+    def dispatch_sync(self, settings, interactive, seed=False):
+        """
+        Starts the seeding, fan-out or single-destination run for the settings.
+
+        :param settings: The current settings as returned by `get_current_settings`.
+        :param interactive: Whether a user started the sync.
+        :param seed: Whether to seed the empty destination with parallel tar streams.
+        :return: None
+        """
+        rsync_options = build_rsync_options(settings)
+        source = settings['source']
+        dest = settings['destination']
+        extra_destinations = split_destinations(settings['extra_destinations'])
+        if seed:
+            self.run_rsync_thread(SeedThread(rsync_options, source, dest), interactive)
+        elif extra_destinations:
+            self.run_rsync_thread(
+                FanoutRsyncThread(rsync_options, source, [dest] + extra_destinations), interactive
+            )
+        else:
+            self.run_rsync_thread(self.create_sync_job(settings), interactive)
 
-        self.output_text = QTextEdit()
-        self.output_text.setReadOnly(True)
-        dialog_layout.addWidget(self.output_text)
+    def create_sync_job(self, settings):
+        """
+        Creates the runner job for a single-destination sync, including the optional
+        move detection pre-pass and multi-pass mode, or for a chunk store backup.
 
-        self.progress_bar = QProgressBar()
-        dialog_layout.addWidget(self.progress_bar)
+        :param settings: The current settings as returned by `get_current_settings`.
+        :return: A RunnerJob ready to be started.
+        """
+        command, prepare = build_sync_job(self.runner_bridge.runner, settings, self.profiles_dir)
+        return self.runner_bridge.create_job(command, prepare=prepare)
 
-        # Add Cancel button
-        self.cancel_button = QPushButton("Cancel")
-        self.cancel_button.clicked.connect(self.cancel_rsync)
-        dialog_layout.addWidget(self.cancel_button)
+    def seeding_possible(self, settings):
+        """
+        Tells whether the seeding mode applies to the settings, before the destination is checked.
 
-        self.output_dialog.show()
+        :param settings: The current settings as returned by `get_current_settings`.
+        :return: True for a single-destination directory sync that is not a dry run.
+        """
+        return (
+            settings['source_type'] == "Directory"
+            and not settings['dry_run']
+            and not settings['extra_destinations'].strip()
+        )
 
-        self.rsync_thread.start()
+    def offer_seeding(self):
+        """
+        Asks whether an empty destination should be seeded with parallel tar streams
+        instead of a plain rsync copy.
+
+        :return: True if the user chose the seeding mode.
+        """
+        reply = QMessageBox.question(
+            self,
+            "Empty Destination",
+            "The destination is empty. Use the fast seeding mode for the initial copy?",
+            QMessageBox.Yes | QMessageBox.No,
+        )
+        return reply == QMessageBox.Yes
+
+    def run_rsync_thread(self, rsync_thread, interactive=True):
+        """
+        :param rsync_thread: The RsyncThread (or subclass) or RunnerJob to run and display output for.
+        :param interactive: Whether to show the output dialog and report with message boxes.
+        :return: None
+        """
+        rsync_thread.interactive = interactive
+        # The shared output dialog and its Cancel button belong to one run at a time. An
+        # unattended run never takes them over from an interactive run that is still going.
+        previous = self.rsync_thread
+        attach = interactive or previous is None or not previous.interactive
+        if attach:
+            if previous is not None:
+                try:
+                    previous.output_signal.disconnect(self.update_output)
+                    previous.progress_signal.disconnect(self.update_progress)
+                except (RuntimeError, TypeError):
+                    pass  # Already finished and deleted
+            self.rsync_thread = rsync_thread
+            rsync_thread.output_signal.connect(self.update_output)
+            rsync_thread.progress_signal.connect(self.update_progress)
+        rsync_thread.error_signal.connect(
+            lambda message, job=rsync_thread: self.rsync_error(message, job)
+        )
+        rsync_thread.finished_signal.connect(
+            lambda success, job=rsync_thread: self.rsync_finished(success, job)
+        )
+        # Release per-run threads once they are done; runner jobs are released by the bridge
+        if isinstance(rsync_thread, QThread):
+            rsync_thread.finished.connect(rsync_thread.deleteLater)
+
+        if attach:
+            self.output_dialog.reset()
+            if interactive:
+                self.output_dialog.show()
+
+        rsync_thread.start()
 
     def update_output(self, text):
         """
@@ -698,8 +860,7 @@ class SyncMateGUI(QWidget):
         :param text: The text to be appended to the output.
         :return: None
         """
-        self.output_text.append(text)
-        self.output_text.ensureCursorVisible()
+        self.output_dialog.append_output(text)
 
     def update_progress(self, value):
         """
@@ -707,42 +868,63 @@ class SyncMateGUI(QWidget):
         :param value: The integer value to update the progress bar to.
         :return: None
         """
-        self.progress_bar.setValue(value)
+        self.output_dialog.set_progress(value)
 
-    def rsync_error(self, error_message):
+    def rsync_error(self, error_message, job=None):
         """
         :param self:
         :param error_message: A string containing the error message to be displayed in the critical message box.
+        :param job: The job that failed; defaults to the most recent one.
         :return: None
         """
-        QMessageBox.critical(self, "Error", error_message)
+        job = job or self.rsync_thread
+        if job is not None and not job.is_running:
+            # Cancelled by the user, who has already been notified
+            self.run_done(job)
+            return
+        if job is None or job.interactive:
+            QMessageBox.critical(self, "Error", error_message)
         self.tray_icon.showMessage(
             "Rsync Error", error_message, QSystemTrayIcon.Critical, 5000
         )
-        self.output_dialog.close()
+        self.run_done(job)
 
-    def rsync_finished(self, success):
+    def rsync_finished(self, success, job=None):
         """
         :param self:
         :param success: A boolean indicating if the rsync operation was successful.
+        :param job: The job that finished; defaults to the most recent one.
         :return: None
         """
+        job = job or self.rsync_thread
         if success:
-            QMessageBox.information(
-                self, "Success", "Rsync operation completed successfully."
-            )
+            if job is None or job.interactive:
+                QMessageBox.information(
+                    self, "Success", "Rsync operation completed successfully."
+                )
             self.tray_icon.showMessage(
                 "Rsync Completed",
                 "Rsync operation completed successfully.",
                 QSystemTrayIcon.Information,
                 5000,
             )
-        self.output_dialog.close()
+        self.run_done(job)
+
+    def run_done(self, job):
+        """
+        Closes the output dialog and drops the reference to the job if it is the most recent run.
+
+        :param job: The job that is done.
+        :return: None
+        """
+        if job is self.rsync_thread:
+            self.rsync_thread = None
+            self.output_dialog.close()
 
     def cancel_rsync(self):
         """
         Prompts the user with a warning message to confirm the cancellation of the rsync operation.
-        If the user confirms and the rsync thread is running, waits for the thread to finish and closes the output dialog.
+        If the user confirms and the rsync job is running, stops it and closes the output dialog.
 
         :return: None
         """
@@ -753,11 +935,64 @@ class SyncMateGUI(QWidget):
             QMessageBox.Yes | QMessageBox.No,
         )
         if reply == QMessageBox.Yes:
-            if self.rsync_thread.isRunning():
-                self.rsync_thread.wait()
+            if self.rsync_thread is not None and self.rsync_thread.isRunning():
+                self.rsync_thread.stop()
                 self.output_dialog.close()
                 QMessageBox.information(self, "Cancelled", "Rsync operation cancelled.")
 
+    def update_memory_usage(self):
+        """
+        Shows the current memory usage of the process in the window and the tray tooltip.
+
+        :return: None
+        """
+        usage = f"Memory: {rss_bytes() / 1048576:.1f} MB"
+        self.memory_label.setText(usage)
+        self.tray_icon.setToolTip(f"SyncMate - {usage}")
+
+    def tray_activated(self, reason):
+        """
+        Shows the main window when the tray icon is clicked.
+
+        :param reason: The QSystemTrayIcon activation reason.
+        :return: None
+        """
+        if reason == QSystemTrayIcon.Trigger:
+            self.show_window()
+
+    def show_window(self):
+        """
+        Shows and raises the main window.
+
+        :return: None
+        """
+        self.show()
+        self.raise_()
+        self.activateWindow()
+
+    def request_show(self, params):
+        """
+        Handles the "show" request of the control socket.
+
+        :param params: The request parameters (unused).
+        :return: The request result.
+        """
+        self.show_requested.emit()
+        return {"shown": True}
+
+    def closeEvent(self, event):
+        """
+        In tray mode, hides the window instead of closing it so scheduled syncs keep running.
+
+        :param event: The close event.
+        :return: None
+        """
+        if self.tray_mode:
+            self.hide()
+            event.ignore()
+        else:
+            super().closeEvent(event)
+
     def load_stylesheet(self):
         # Load stylesheet from external .qss file
         qss_path = os.path.join(os.path.dirname(__file__), "resources", "styles.qss")
@@ -1,10 +1,154 @@
 import sys
-from PySide6.QtWidgets import QApplication
-from gui import SyncMateGUI
+
+from control_socket import default_socket_path, instance_running, request
+
+
+def profile_argument():
+    """
+    Returns the profile name given with `--run-profile`, or None.
+    """
+    if "--run-profile" not in sys.argv:
+        return None
+    index = sys.argv.index("--run-profile") + 1
+    if index >= len(sys.argv):
+        sys.exit("Error: --run-profile needs a profile name")
+    return sys.argv[index]
+
+
+def forward_to_running_instance(profile):
+    """
+    Passes the request on to an instance that is already running, if there is one.
+
+    Returns True if an instance handled it.
+
+    Raises RuntimeError if the instance reports an error or the request cannot be forwarded.
+    """
+    if not instance_running():
+        return False
+    if profile is not None:
+        result = request(None, "run_profile", {"profile": profile})
+        print(f"Queued profile '{profile}' as job {result['job']}")
+    elif "--headless" in sys.argv:
+        raise RuntimeError(f"SyncMate is already running and listening on {default_socket_path()}")
+    else:
+        request(None, "show")
+    return True
+
+
+def run_profile_once(profile):
+    """
+    Runs one saved profile in this process and prints its output, when no instance is running.
+
+    Returns the exit status.
+    """
+    import json
+    import os
+
+    from async_runner import AsyncRunner, FINISHED
+    from sync_jobs import build_sync_job
+
+    profiles_dir = os.path.join(os.path.dirname(__file__), "profiles")
+    profile_path = os.path.join(profiles_dir, f"{profile}.json")
+    if os.path.basename(profile) != profile or not os.path.exists(profile_path):
+        print(f"Error: Profile '{profile}' not found", file=sys.stderr)
+        return 1
+    with open(profile_path, "r") as f:
+        settings = json.load(f)
+
+    runner = AsyncRunner()
+    runner.add_listener(lambda event: print(event["line"]) if event["type"] == "output" else None)
+    try:
+        command, prepare = build_sync_job(runner, settings, profiles_dir)
+        result = runner.wait(runner.submit(command, name=profile, prepare=prepare))
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        runner.stop()
+    if result["state"] != FINISHED:
+        reason = result["error"] or f"exit code {result['returncode']}"
+        print(f"Error: Profile '{profile}' failed: {reason}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def run_headless():
+    """
+    Runs the scheduler and control socket without a GUI until interrupted.
+    """
+    import json
+    import os
+    import signal
+    import threading
+    from datetime import datetime
+
+    import schedule
+
+    from async_runner import AsyncRunner
+    from control_socket import ControlServer
+    from sync_jobs import build_sync_job
+
+    profiles_dir = os.path.join(os.path.dirname(__file__), "profiles")
+    os.makedirs(profiles_dir, exist_ok=True)
+    runner = AsyncRunner()
+    runner.start()
+    server = ControlServer(runner, profiles_dir)
+    if not server.start():
+        print(f"Could not listen on {default_socket_path()}", file=sys.stderr)
+        runner.stop()
+        return 1
+
+    def run_task(task):
+        try:
+            command, prepare = build_sync_job(runner, task["profile"], profiles_dir)
+            runner.submit(command, name=task["name"], prepare=prepare)
+        except ValueError as e:
+            print(f"Scheduled task '{task['name']}' skipped: {e}", file=sys.stderr)
+
+    tasks_file = os.path.join(profiles_dir, "scheduled_tasks.json")
+    if os.path.exists(tasks_file):
+        with open(tasks_file, "r") as file:
+            for task in json.load(file):
+                run_time = datetime.fromisoformat(task["time"])
+                schedule.every().day.at(run_time.strftime("%H:%M:%S")).do(run_task, task).tag(task["name"])
+
+    stopping = threading.Event()
+    signal.signal(signal.SIGINT, lambda *args: stopping.set())
+    signal.signal(signal.SIGTERM, lambda *args: stopping.set())
+    print(f"SyncMate running headless, listening on {server.socket_path}")
+    while not stopping.is_set():
+        schedule.run_pending()
+        stopping.wait(1)
+
+    server.stop()
+    runner.stop()
+    return 0
+
 
 if __name__ == "__main__":
+    # A second launch hands its request to the running instance instead of starting another
+    profile = profile_argument()
+    try:
+        if forward_to_running_instance(profile):
+            sys.exit(0)
+    except RuntimeError as e:
+        sys.exit(f"Error: {e}")
+    if profile is not None:
+        sys.exit(run_profile_once(profile))
+    if "--headless" in sys.argv:
+        sys.exit(run_headless())
+
+    from PySide6.QtWidgets import QApplication
+    from gui import SyncMateGUI
+
     app = QApplication(sys.argv)
-    ex = SyncMateGUI()
-    ex.show()
+    # Long-running tray mode: start hidden and keep running when the window is closed
+    tray_mode = "--tray" in sys.argv
+    app.setQuitOnLastWindowClosed(not tray_mode)
+    ex = SyncMateGUI(tray_mode=tray_mode)
+    if not tray_mode:
+        ex.show()
     app.aboutToQuit.connect(ex.tray_icon.hide)
+    app.aboutToQuit.connect(ex.control_server.stop)
+    app.aboutToQuit.connect(ex.runner_bridge.shutdown)
     sys.exit(app.exec())
\ No newline at end of file
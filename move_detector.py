@@ -0,0 +1,274 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+from path_utils import is_remote_destination, scan_tree, seed_target
+
+HASH_CHUNK_SIZE = 1024 * 1024
+MIN_MOVE_SIZE = 64 * 1024  # Smaller files are cheaper to resend than to hash
+MAX_CACHE_ENTRIES = 500000
+
+# Serializes cache writes by jobs running concurrently in this process
+cache_lock = threading.Lock()
+
+
+class HashCache:
+    """
+    Persistent cache of file content hashes keyed by device and inode.
+
+    An entry is reused only while the file keeps the size and modification time it had when
+    it was hashed, so a file that is renamed within the same filesystem is never read twice.
+
+    Methods:
+        load():
+            Reads the cache file, ignoring a missing or corrupt one.
+
+        save():
+            Writes the entries used during this run back to the cache file.
+
+        file_hash(path, stat):
+            Returns the content hash of a file, computing it only when needed.
+    """
+
+    def __init__(self, path):
+        """
+        Initializes the HashCache object.
+
+        Args:
+            path (str): Location of the JSON cache file.
+        """
+        self.path = path
+        self.entries = {}
+        self.used = {}
+
+    def load(self):
+        """
+        Reads the cache file, ignoring a missing or corrupt one.
+        """
+        try:
+            with open(self.path, "r") as file:
+                self.entries = json.load(file)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def save(self):
+        """
+        Merges the entries used during this run into the cache file.
+
+        Entries written by other jobs since this one loaded the cache are kept, and every
+        writer uses its own temporary file, so concurrent jobs never fail on each other's
+        writes.
+        """
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with cache_lock:
+            try:
+                with open(self.path, "r") as file:
+                    entries = json.load(file)
+            except (OSError, ValueError):
+                entries = {}
+            for key, entry in self.used.items():
+                entries.pop(key, None)
+                entries[key] = entry  # Most recently used entries are kept when trimming
+            entries = dict(list(entries.items())[-MAX_CACHE_ENTRIES:])
+            descriptor, temp_path = tempfile.mkstemp(
+                prefix=os.path.basename(self.path) + ".", suffix=".tmp", dir=os.path.dirname(self.path) or "."
+            )
+            try:
+                with os.fdopen(descriptor, "w") as file:
+                    json.dump(entries, file)
+                os.replace(temp_path, self.path)
+            except BaseException:
+                os.remove(temp_path)
+                raise
+
+    def file_hash(self, path, stat):
+        """
+        Returns the content hash of a file, computing it only when needed.
+
+        Args:
+            path (str): Path of the file.
+            stat (os.stat_result): Result of `os.lstat` for the file.
+        """
+        key = f"{stat.st_dev}:{stat.st_ino}"
+        entry = self.entries.get(key)
+        if entry is None or entry["size"] != stat.st_size or entry["mtime"] != stat.st_mtime_ns:
+            digest = hashlib.blake2b()
+            with open(path, "rb") as file:
+                for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+                    digest.update(chunk)
+            entry = {"size": stat.st_size, "mtime": stat.st_mtime_ns, "hash": digest.hexdigest()}
+            self.entries[key] = entry
+        self.used[key] = entry
+        return entry["hash"]
+
+
+class MoveDetector:
+    """
+    Pre-pass that replays renames and moves of the source tree on the destination.
+
+    Files that exist only in the source ("new") are matched to files that exist only in the
+    destination ("deleted") of the same size, first by inode when both trees share a
+    filesystem and otherwise by content hash. Matches are moved into place on the destination
+    so the following rsync run finds them already present and transfers nothing for them.
+    Without `--delete` the destination keeps its old paths, so matches are hard-linked
+    instead of moved. Only local (or locally mounted) destinations are supported.
+
+    Methods:
+        run(emit):
+            Detects and applies the moves, reporting through `emit`, and returns the bytes saved.
+    """
+
+    def __init__(self, source, dest, cache_path, keep_originals=True, exclude_patterns=(), dry_run=False):
+        """
+        Initializes the MoveDetector object.
+
+        Args:
+            source (str): The source directory, as given to rsync.
+            dest (str): The destination directory, as given to rsync.
+            cache_path (str): Location of the persistent hash cache.
+            keep_originals (bool): Hard-link matches instead of moving them.
+            exclude_patterns (list): Patterns excluded from the sync.
+            dry_run (bool): Only report the moves that would be applied.
+        """
+        self.source = source
+        self.dest = dest
+        self.cache = HashCache(cache_path)
+        self.keep_originals = keep_originals
+        self.exclude_patterns = list(exclude_patterns)
+        self.dry_run = dry_run
+
+    def run(self, emit=print):
+        """
+        Detects and applies the moves, reporting through `emit`.
+
+        Args:
+            emit (callable): Receives progress and summary lines.
+
+        Returns:
+            int: The number of bytes that no longer need to be transferred.
+
+        Raises:
+            RuntimeError: If `emit` is a JobReporter whose job has been cancelled.
+        """
+        if is_remote_destination(self.dest):
+            emit("Move detection skipped: only local destinations are supported")
+            return 0
+        dest_root = seed_target(self.source, self.dest)
+        if not os.path.isdir(self.source) or not os.path.isdir(dest_root):
+            return 0
+
+        emit("Detecting moved files")
+        self.cache.load()
+        saved = 0
+        relocated = 0
+        try:
+            moves = self.plan(dest_root, emit)
+            for old_path, new_path, size in moves:
+                self.check_cancelled(emit)
+                if self.dry_run:
+                    emit(f"Would move {old_path} -> {new_path}")
+                elif self.apply(dest_root, old_path, new_path):
+                    emit(f"Moved {old_path} -> {new_path}")
+                else:
+                    emit(f"Could not move {old_path} -> {new_path}")
+                    continue
+                relocated += 1
+                saved += size
+        finally:
+            # Hashes computed before a cancellation are kept for the next run
+            try:
+                self.cache.save()
+            except OSError as e:
+                # The moves are already applied; a lost cache only costs rehashing next time
+                emit(f"Could not save the hash cache: {e}")
+
+        emit(
+            f"Move detection: {relocated} of {len(moves)} moved files relocated, "
+            f"{saved / 1048576:.1f} MB not retransferred"
+        )
+        return saved
+
+    def check_cancelled(self, emit):
+        """
+        Raises RuntimeError if `emit` is a JobReporter whose job has been cancelled.
+        """
+        if getattr(emit, "cancelled", False):
+            raise RuntimeError("Rsync operation cancelled")
+
+    def plan(self, dest_root, emit=print):
+        """
+        Matches new source files to deleted destination files.
+
+        Args:
+            dest_root (str): The destination directory that mirrors the source.
+            emit (callable): The reporter passed to `run`, checked for cancellation.
+
+        Returns:
+            list: (old_path, new_path, size) tuples relative to `dest_root`.
+        """
+        source_files = scan_tree(self.source, self.exclude_patterns)
+        self.check_cancelled(emit)
+        dest_files = scan_tree(dest_root, self.exclude_patterns)
+
+        gone_by_size = {}
+        for relative_path, stat in dest_files.items():
+            if relative_path not in source_files and stat.st_size >= MIN_MOVE_SIZE:
+                gone_by_size.setdefault(stat.st_size, []).append(relative_path)
+
+        moves = []
+        for relative_path, stat in source_files.items():
+            self.check_cancelled(emit)
+            if relative_path in dest_files:
+                continue
+            candidates = gone_by_size.get(stat.st_size)
+            if not candidates:
+                continue
+            match = self.find_match(os.path.join(self.source, relative_path), stat, dest_root, dest_files, candidates)
+            if match is not None:
+                candidates.remove(match)
+                moves.append((match, relative_path, stat.st_size))
+        return moves
+
+    def find_match(self, source_path, source_stat, dest_root, dest_files, candidates):
+        """
+        Returns the candidate with the same content as the source file, or None.
+        """
+        for candidate in candidates:
+            dest_stat = dest_files[candidate]
+            if (dest_stat.st_dev, dest_stat.st_ino) == (source_stat.st_dev, source_stat.st_ino):
+                return candidate  # Both trees share the file, no need to read it
+
+        source_hash = None
+        for candidate in candidates:
+            try:
+                if source_hash is None:
+                    source_hash = self.cache.file_hash(source_path, source_stat)
+                dest_hash = self.cache.file_hash(os.path.join(dest_root, candidate), dest_files[candidate])
+            except OSError:
+                continue
+            if dest_hash == source_hash:
+                return candidate
+        return None
+
+    def apply(self, dest_root, old_path, new_path):
+        """
+        Moves or hard-links one destination file to its new path.
+
+        Returns:
+            bool: True if the file is now present at the new path.
+        """
+        old_full_path = os.path.join(dest_root, old_path)
+        new_full_path = os.path.join(dest_root, new_path)
+        try:
+            os.makedirs(os.path.dirname(new_full_path), exist_ok=True)
+            if os.path.lexists(new_full_path):
+                return False
+            if self.keep_originals:
+                os.link(old_full_path, new_full_path)
+            else:
+                os.rename(old_full_path, new_full_path)
+        except OSError:
+            return False
+        return True
@@ -0,0 +1,221 @@
+import os
+import shutil
+import tempfile
+import threading
+
+from async_runner import FINISHED
+from path_utils import is_remote_destination, scan_tree, seed_target
+
+SPARSE = "sparse"
+LARGE = "large"
+SMALL = "small"
+FILE_CLASSES = (SPARSE, LARGE, SMALL)
+
+LARGE_FILE_SIZE = 256 * 1024 * 1024
+DATABASE_FILE_SIZE = 16 * 1024 * 1024
+SPARSE_MIN_SIZE = 1024 * 1024
+VM_IMAGE_EXTENSIONS = {".img", ".qcow2", ".vmdk", ".vdi", ".vhd", ".vhdx", ".raw"}
+DATABASE_EXTENSIONS = {".db", ".sqlite", ".sqlite3", ".mdf", ".ldf", ".ibd", ".frm"}
+
+FINAL_PASS_WEIGHT = 0.05  # Share of the progress bar given to the closing full pass
+WAIT_INTERVAL = 0.2
+
+
+def classify_file(relative_path, stat):
+    """
+    Returns the class of a file, which decides the rsync flags used to transfer it.
+
+    Args:
+        relative_path (str): Path of the file relative to the source.
+        stat (os.stat_result): Result of `os.lstat` for the file.
+
+    Returns:
+        str: One of `SPARSE`, `LARGE` or `SMALL`.
+    """
+    extension = os.path.splitext(relative_path)[1].lower()
+    allocated = getattr(stat, "st_blocks", None)
+    if stat.st_size >= SPARSE_MIN_SIZE and (
+        extension in VM_IMAGE_EXTENSIONS
+        or (allocated is not None and allocated * 512 < stat.st_size // 2)
+    ):
+        return SPARSE
+    if stat.st_size >= LARGE_FILE_SIZE or (
+        extension in DATABASE_EXTENSIONS and stat.st_size >= DATABASE_FILE_SIZE
+    ):
+        return LARGE
+    return SMALL
+
+
+def class_options(file_class, dest, allow_inplace=True):
+    """
+    Returns the rsync flags tuned for a class of files.
+
+    Args:
+        file_class (str): One of `SPARSE`, `LARGE` or `SMALL`.
+        dest (str): The destination, used to tell local from remote transfers.
+        allow_inplace (bool): Whether destination files may be rewritten in place. It must be
+            False when destination files can be hard links shared with other paths.
+    """
+    if file_class == SPARSE:
+        return ["--sparse"]
+    if file_class == LARGE:
+        options = ["--partial", "--preallocate"]
+        if allow_inplace:
+            options.append("--inplace")
+        if not is_remote_destination(dest):
+            options.append("--whole-file")
+        return options
+    if not is_remote_destination(dest):
+        return ["--whole-file"]
+    return []
+
+
+class MultiPassSync:
+    """
+    Splits a directory sync into passes with rsync flags tuned for each class of file.
+
+    The source is scanned once and its files are classified as sparse images, large files or
+    small files. One rsync pass per non-empty class is submitted to the AsyncRunner, so the
+    passes run in parallel under the runner's concurrency limit, and a closing full pass then
+    handles directories, links, deletions and metadata. Progress is combined across the passes
+    by size, and the throughput of each pass is reported when it finishes.
+
+    Methods:
+        run(report):
+            Runs all passes; meant to be used as the `prepare` step of a runner job.
+    """
+
+    def __init__(self, runner, options, source, dest, exclude_patterns=(), allow_inplace=True):
+        """
+        Initializes the MultiPassSync object.
+
+        Args:
+            runner (AsyncRunner): The runner that executes the passes.
+            options (list): The rsync executable followed by its options, without paths.
+            source (str): The source directory.
+            dest (str): The destination directory.
+            exclude_patterns (list): Patterns excluded from the sync.
+            allow_inplace (bool): Whether large files may be rewritten in place.
+        """
+        self.runner = runner
+        self.options = options
+        self.source = source
+        self.dest = dest
+        self.exclude_patterns = list(exclude_patterns)
+        self.allow_inplace = allow_inplace
+        self.lock = threading.Lock()
+        self.pass_progress = {}
+        self.pass_weights = {}
+
+    def run(self, report):
+        """
+        Classifies the source, runs one pass per class in parallel and closes with a full pass.
+
+        Args:
+            report (JobReporter): Receives output lines and the combined progress.
+
+        Raises:
+            RuntimeError: If any pass fails.
+        """
+        files = scan_tree(self.source, self.exclude_patterns)
+        classes = {file_class: [] for file_class in FILE_CLASSES}
+        for relative_path, stat in files.items():
+            classes[classify_file(relative_path, stat)].append((relative_path, stat.st_size))
+        total_bytes = max(sum(stat.st_size for stat in files.values()), 1)
+        report(", ".join(
+            f"{len(entries)} {file_class} files" for file_class, entries in classes.items()
+        ))
+
+        list_dir = tempfile.mkdtemp(prefix="syncmate-passes-")
+        target = seed_target(self.source, self.dest)
+        if not is_remote_destination(target) and "--dry-run" not in self.options:
+            os.makedirs(target, exist_ok=True)
+
+        listener = lambda event: self.track(event, report)
+        self.runner.add_listener(listener)
+        try:
+            passes = {}
+            for file_class, entries in classes.items():
+                if not entries:
+                    continue
+                list_path = os.path.join(list_dir, file_class)
+                with open(list_path, "wb") as list_file:
+                    for relative_path, _ in entries:
+                        list_file.write(os.fsencode(relative_path) + b"\0")
+                command = (
+                    [option for option in self.options if option != "--delete"]
+                    + class_options(file_class, self.dest, self.allow_inplace)
+                    + ["--from0", f"--files-from={list_path}", os.path.join(self.source, ""), target]
+                )
+                weight = (1 - FINAL_PASS_WEIGHT) * sum(size for _, size in entries) / total_bytes
+                with self.lock:
+                    job_id = self.runner.submit(command, name=f"{file_class} pass")
+                    self.pass_weights[job_id] = weight
+                    self.pass_progress[job_id] = 0
+                # Holding the Job keeps its result even after it leaves the runner's history
+                passes[job_id] = (file_class, entries, self.runner.get_job(job_id))
+
+            self.wait_for([job for _, _, job in passes.values()], report)
+            for file_class, entries, job in passes.values():
+                if job.state != FINISHED:
+                    raise RuntimeError(f"The {file_class} pass failed: {job.error}")
+                seconds = max(job.ended - (job.started or job.submitted), 1e-6)
+                size = sum(size for _, size in entries)
+                report(
+                    f"{file_class} pass: {len(entries)} files, {size / 1048576:.1f} MB in {seconds:.1f}s "
+                    f"({size / 1048576 / seconds:.1f} MB/s, {len(entries) / seconds:.0f} files/s)"
+                )
+
+            with self.lock:
+                final_id = self.runner.submit(self.options + [self.source, self.dest], name="final pass")
+                self.pass_weights[final_id] = FINAL_PASS_WEIGHT
+                self.pass_progress[final_id] = 0
+            job = self.runner.get_job(final_id)
+            self.wait_for([job], report)
+            if job.state != FINISHED:
+                raise RuntimeError(f"The final pass failed: {job.error}")
+            report.progress(100)
+        finally:
+            self.runner.remove_listener(listener)
+            shutil.rmtree(list_dir, ignore_errors=True)
+
+    def wait_for(self, jobs, report):
+        """
+        Waits for the given passes, cancelling them if the parent job is cancelled.
+
+        The Job objects are waited on directly rather than looked up by identifier, since a
+        pass may drop out of the runner's bounded history while others are still running.
+
+        Raises:
+            RuntimeError: If the parent job was cancelled.
+        """
+        for job in jobs:
+            while not job.done.wait(WAIT_INTERVAL):
+                if report.cancelled:
+                    for other in jobs:
+                        self.runner.cancel(other.id)
+            if report.cancelled:
+                raise RuntimeError("Rsync operation cancelled")
+
+    def track(self, event, report):
+        """
+        Forwards the output of the passes and combines their progress. Runs on the loop thread.
+        """
+        job_id = event["job"]
+        with self.lock:
+            if job_id not in self.pass_weights:
+                return
+            if event["type"] == "output":
+                name = self.runner.get_job(job_id).name
+                report(f"[{name}] {event['line']}")
+                return
+            if event["type"] == "progress":
+                self.pass_progress[job_id] = event["value"]
+            elif event["type"] == "state" and event["state"] == FINISHED:
+                self.pass_progress[job_id] = 100
+            else:
+                return
+            progress = sum(
+                self.pass_weights[pass_id] * self.pass_progress[pass_id] for pass_id in self.pass_weights
+            )
+        report.progress(int(progress))
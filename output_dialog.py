@@ -0,0 +1,79 @@
+from PySide6.QtCore import Signal
+from PySide6.QtWidgets import QDialog, QProgressBar, QPushButton, QTextEdit, QVBoxLayout
+
+OUTPUT_MAX_LINES = 5000
+
+
+class OutputDialog(QDialog):
+    """
+    Dialog showing the output and progress of an rsync run, reused from one run to the next.
+
+    The output is kept in a document limited to a fixed number of lines, so neither long
+    runs nor thousands of scheduled runs make it grow without bound.
+
+    Attributes:
+        cancel_requested (Signal): Signal emitted when the Cancel button is clicked.
+
+    Methods:
+        reset():
+            Clears the output and progress for a new run.
+
+        append_output(text):
+            Appends one or more lines of output.
+
+        set_progress(value):
+            Updates the progress bar.
+    """
+    cancel_requested = Signal()
+
+    def __init__(self, parent=None, max_lines=OUTPUT_MAX_LINES):
+        """
+        Initializes the OutputDialog object.
+
+        Args:
+            parent (QWidget): Parent widget.
+            max_lines (int): Maximum number of output lines kept.
+        """
+        super().__init__(parent)
+        self.setWindowTitle("Rsync Output")
+        dialog_layout = QVBoxLayout()
+        self.setLayout(dialog_layout)
+
+        self.output_text = QTextEdit()
+        self.output_text.setReadOnly(True)
+        self.output_text.document().setMaximumBlockCount(max_lines)
+        dialog_layout.addWidget(self.output_text)
+
+        self.progress_bar = QProgressBar()
+        dialog_layout.addWidget(self.progress_bar)
+
+        # Add Cancel button
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.clicked.connect(self.cancel_requested.emit)
+        dialog_layout.addWidget(self.cancel_button)
+
+    def reset(self):
+        """
+        Clears the output and progress for a new run.
+        """
+        self.output_text.clear()
+        self.progress_bar.setValue(0)
+
+    def append_output(self, text):
+        """
+        Appends one or more lines of output and scrolls to them.
+
+        Args:
+            text (str): The text to append.
+        """
+        self.output_text.append(text)
+        self.output_text.ensureCursorVisible()
+
+    def set_progress(self, value):
+        """
+        Updates the progress bar.
+
+        Args:
+            value (int): The progress percentage.
+        """
+        self.progress_bar.setValue(value)
@@ -0,0 +1,75 @@
+import fnmatch
+import os
+
+
+def is_remote_destination(dest):
+    """
+    Returns True if the destination uses rsync's `host:path` remote syntax.
+
+    Args:
+        dest (str): The destination path.
+    """
+    head = dest.split("/", 1)[0]
+    return ":" in head and not (len(head) == 2 and head[1] == ":")  # Skip Windows drives
+
+
+def seed_target(source, dest):
+    """
+    Returns the directory the tree must be unpacked into to match rsync's placement rules.
+
+    Without a trailing slash rsync copies the source directory itself into the destination,
+    with one it copies only the directory contents.
+
+    Args:
+        source (str): The source directory.
+        dest (str): The destination directory.
+    """
+    if source.endswith(("/", os.sep)):
+        return dest
+    name = os.path.basename(os.path.normpath(source))
+    if is_remote_destination(dest):
+        return dest.rstrip("/") + "/" + name
+    return os.path.join(dest, name)
+
+
+def is_excluded(relative_path, patterns):
+    """
+    Returns True if any component of the path matches one of the exclude patterns.
+
+    Args:
+        relative_path (str): Path relative to the tree root.
+        patterns (list): Shell-style patterns, as passed to rsync's `--exclude`.
+    """
+    parts = relative_path.split(os.sep)
+    return any(
+        fnmatch.fnmatch(part, pattern) or fnmatch.fnmatch(relative_path, pattern)
+        for pattern in patterns
+        for part in parts
+    )
+
+
+def scan_tree(root, patterns):
+    """
+    Lists the regular files below a directory.
+
+    Args:
+        root (str): The directory to scan.
+        patterns (list): Exclude patterns.
+
+    Returns:
+        dict: Relative path to `os.stat_result` for each regular file.
+    """
+    files = {}
+    for current, directories, names in os.walk(root):
+        for name in names:
+            path = os.path.join(current, name)
+            relative_path = os.path.relpath(path, root)
+            if is_excluded(relative_path, patterns):
+                continue
+            try:
+                stat = os.lstat(path)
+            except OSError:
+                continue
+            if os.path.stat.S_ISREG(stat.st_mode):
+                files[relative_path] = stat
+    return files
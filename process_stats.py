@@ -0,0 +1,33 @@
+import os
+import sys
+import threading
+
+
+def rss_bytes():
+    """
+    Returns the resident set size of the current process in bytes.
+
+    Reads /proc on Linux and falls back to the peak value reported by `resource` elsewhere,
+    or 0 where neither is available.
+    """
+    try:
+        with open("/proc/self/statm", "r") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # macOS reports bytes, Linux KiB
+
+
+def thread_count():
+    """
+    Returns the number of OS threads of the current process.
+    """
+    try:
+        return len(os.listdir("/proc/self/task"))
+    except OSError:
+        return threading.active_count()
@@ -1,5 +1,8 @@
 from PySide6.QtCore import QThread, Signal
 
+from async_runner import parse_to_check
+
+
 class RsyncThread(QThread):
     """
     Class representing a thread for executing an rsync command and emitting signals based on progress and outcome.
@@ -17,6 +20,12 @@ class RsyncThread(QThread):
         run():
             Executes the rsync command in a subprocess, processes the output to compute the progress,
             and emits appropriate signals based on the status of the rsync operation.
+
+        run_command(command, progress_callback):
+            Runs a single rsync command to completion and returns its exit code.
+
+        stop():
+            Requests the running rsync process to terminate.
     """
     output_signal = Signal(str)
     progress_signal = Signal(int)
@@ -40,39 +49,63 @@ class RsyncThread(QThread):
         Executes the rsync command in a subprocess, processes the output to compute the progress,
         and emits appropriate signals based on the status of the rsync operation.
         """
-        import subprocess
-
         try:
-            self.process = subprocess.Popen(
-                self.command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                universal_newlines=True,)
-
-            total_files = None
-            for line in self.process.stdout:
-                if not self.is_running:
-                    self.process.terminate()
-                    break
-
-                self.output_signal.emit(line.strip())
-
-                if "to-check" in line:
-                    try:
-                        to_check = int(line.split("to-check=")[1].split("/")[0])
-                        total = int(line.split("to-check=")[1].split("/")[1])
-                        if total_files is None:
-                            total_files = total
-
-                        files_transferred = total - to_check
-                        progress = int((files_transferred / total_files) * 100)
-                        self.progress_signal.emit(progress)
-                    except:
-                        pass
-            self.process.wait()
-            if self.process.returncode == 0:
+            returncode = self.run_command(self.command)
+            if returncode == 0:
                 self.finished_signal.emit(True)
             else:
-                self.error_signal.emit(f"Rsync exited with code {self.process.returncode}")
+                self.error_signal.emit(f"Rsync exited with code {returncode}")
         except Exception as e:
-            self.error_signal.emit(str(e))
\ No newline at end of file
+            self.error_signal.emit(str(e))
+
+    def run_command(self, command, progress_callback=None):
+        """
+        Runs a single rsync command, forwarding its output and progress, and waits for it to exit.
+
+        Args:
+            command (list): The rsync command to be executed.
+            progress_callback (callable): Receives each progress percentage. Defaults to emitting
+                `progress_signal`.
+
+        Returns:
+            int: The exit code of the rsync process.
+        """
+        import subprocess
+
+        if progress_callback is None:
+            progress_callback = self.progress_signal.emit
+
+        self.process = subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            universal_newlines=True,)
+
+        total_files = None
+        for line in self.process.stdout:
+            if not self.is_running:
+                self.process.terminate()
+                break
+
+            self.output_signal.emit(line.strip())
+
+            counts = parse_to_check(line)
+            if counts is not None:
+                to_check, total = counts
+                if total_files is None:
+                    total_files = total
+
+                if total_files:
+                    files_transferred = total - to_check
+                    progress = int((files_transferred / total_files) * 100)
+                    progress_callback(progress)
+        self.process.wait()
+        return self.process.returncode
+
+    def stop(self):
+        """
+        Requests the running rsync process to terminate.
+        """
+        self.is_running = False
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
@@ -0,0 +1,74 @@
+import os
+
+
+def rsync_executable():
+    """
+    Returns the rsync executable to run, which can be overridden with the SYNCMATE_RSYNC
+    environment variable (for instance to point SyncMate at `fake_rsync.py`).
+    """
+    return os.environ.get("SYNCMATE_RSYNC", "rsync")
+
+
+def build_rsync_options(settings):
+    """
+    Builds the rsync command line, without source and destination, from profile settings.
+
+    Args:
+        settings (dict): Profile settings as returned by `SyncMateGUI.get_current_settings`.
+
+    Returns:
+        list: The rsync executable followed by the selected options.
+    """
+    rsync_command = [rsync_executable(), "-a"]  # '-a' is for archive mode
+
+    # Bandwidth limit
+    bwlimit_value = settings.get("bwlimit", 0)
+    if bwlimit_value > 0:
+        rsync_command.extend(["--bwlimit", str(bwlimit_value)])
+
+    # Handle file or directory
+    if settings.get("source_type", "Directory") == "File":
+        rsync_command.remove("-a")  # Remove '-a' option for files
+        rsync_command.append("-r")  # Recursively copy
+
+    # Add options based on the selected checkboxes
+    if settings.get("dry_run", False):
+        rsync_command.append("--dry-run")
+    if settings.get("delete", False):
+        rsync_command.append("--delete")
+    if settings.get("compress", False):
+        rsync_command.append("--compress")
+    if settings.get("verbose", False):
+        rsync_command.append("--verbose")
+        rsync_command.append("--progress")  # Add progress for verbose mode
+
+    # Handle exclude patterns
+    for pattern in exclude_pattern_list(settings):
+        rsync_command.extend(["--exclude", pattern])
+
+    return rsync_command
+
+
+def exclude_pattern_list(settings):
+    """
+    Returns the exclude patterns of the profile settings as a list.
+
+    Args:
+        settings (dict): Profile settings as returned by `SyncMateGUI.get_current_settings`.
+    """
+    return [
+        pattern.strip() for pattern in settings.get("exclude_patterns", "").split(",") if pattern.strip()
+    ]
+
+
+def split_destinations(destinations):
+    """
+    Splits a comma-separated destination list into individual destinations.
+
+    Args:
+        destinations (str): Comma-separated destinations, as stored in profiles.
+
+    Returns:
+        list: The non-empty destinations with surrounding whitespace removed.
+    """
+    return [dest.strip() for dest in destinations.split(",") if dest.strip()]
@@ -0,0 +1,191 @@
+import threading
+from collections import deque
+
+from PySide6.QtCore import QObject, QTimer, Signal
+
+from async_runner import AsyncRunner, CANCELLED, DONE_STATES, FINISHED
+
+DRAIN_INTERVAL_MS = 50
+
+
+class RunnerJob(QObject):
+    """
+    Qt-side handle of a job executed by the AsyncRunner.
+
+    It exposes the same signals as RsyncThread so the GUI can display either one. Signals are
+    emitted on the GUI thread by the RunnerBridge.
+
+    Attributes:
+        output_signal (Signal): Signal emitted with new output, one or more lines at a time.
+        progress_signal (Signal): Signal emitted with the progress percentage of the job.
+        error_signal (Signal): Signal emitted when the job fails or is cancelled.
+        finished_signal (Signal): Signal emitted when the job finishes successfully.
+    """
+    output_signal = Signal(str)
+    progress_signal = Signal(int)
+    error_signal = Signal(str)
+    finished_signal = Signal(bool)
+
+    def __init__(self, bridge, command, name=None, prepare=None):
+        """
+        Initializes the RunnerJob object.
+
+        Args:
+            bridge (RunnerBridge): The bridge that runs the job and delivers its events.
+            command (list): The command to execute, or None.
+            name (str): Human readable name of the job.
+            prepare (callable): Optional blocking step run in a worker thread before the command.
+        """
+        super().__init__(bridge)
+        self.bridge = bridge
+        self.command = command
+        self.name = name
+        self.prepare = prepare
+        self.job_id = None
+        self.state = None
+        self.is_running = True
+
+    def start(self):
+        """
+        Submits the job to the runner.
+        """
+        self.job_id = self.bridge.submit(self)
+
+    def stop(self):
+        """
+        Requests cancellation of the job.
+        """
+        self.is_running = False
+        if self.job_id is not None:
+            self.bridge.runner.cancel(self.job_id)
+
+    def isRunning(self):
+        """
+        Returns True while the job has been submitted and is not done yet.
+        """
+        return self.job_id is not None and self.state not in DONE_STATES
+
+
+class RunnerBridge(QObject):
+    """
+    The single thread-safe link between the AsyncRunner and the Qt GUI.
+
+    Runner events are collected from the loop thread into bounded per-job buffers and
+    delivered on the GUI thread by a timer. Each delivery coalesces all pending output of a
+    job into one signal and keeps only its latest progress value, so a burst of output costs
+    the GUI a bounded amount of work and memory. Lines that overflow the buffer are replaced
+    by a short notice.
+
+    Methods:
+        submit(job):
+            Registers a RunnerJob and queues it on the runner.
+
+        create_job(command, name, prepare):
+            Creates a RunnerJob parented to the bridge.
+
+        shutdown():
+            Stops the drain timer and the runner.
+    """
+
+    def __init__(self, parent=None, runner=None, buffer_lines=1000):
+        """
+        Initializes the RunnerBridge object.
+
+        Args:
+            parent (QObject): Parent object.
+            runner (AsyncRunner): The runner to use; a new one is created if omitted.
+            buffer_lines (int): Maximum number of undelivered output lines kept per job.
+        """
+        super().__init__(parent)
+        self.runner = runner or AsyncRunner(buffer_lines=buffer_lines)
+        self.buffer_lines = buffer_lines
+        self.jobs = {}
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.runner.add_listener(self.collect)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.deliver)
+        self.timer.start(DRAIN_INTERVAL_MS)
+
+    def create_job(self, command, name=None, prepare=None):
+        """
+        Creates a RunnerJob parented to the bridge. Call `start()` on it to run it.
+        """
+        return RunnerJob(self, command, name, prepare)
+
+    def submit(self, job):
+        """
+        Registers a RunnerJob and queues it on the runner.
+
+        Returns:
+            int: The runner's job identifier.
+        """
+        with self.lock:
+            job_id = self.runner.submit(job.command, job.name, job.prepare)
+            self.jobs[job_id] = job
+        return job_id
+
+    def collect(self, event):
+        """
+        Stores a runner event for delivery. Called on the runner's loop thread.
+        """
+        with self.lock:
+            pending = self.pending.get(event["job"])
+            if pending is None:
+                pending = self.pending[event["job"]] = {
+                    "lines": deque(maxlen=self.buffer_lines),
+                    "dropped": 0,
+                    "progress": None,
+                    "state": None,
+                }
+            if event["type"] == "output":
+                if len(pending["lines"]) == self.buffer_lines:
+                    pending["dropped"] += 1
+                pending["lines"].append(event["line"])
+            elif event["type"] == "progress":
+                pending["progress"] = event["value"]
+            elif event["type"] == "state":
+                pending["state"] = event
+
+    def deliver(self):
+        """
+        Emits the collected events on the GUI thread.
+        """
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            jobs = {job_id: self.jobs.get(job_id) for job_id in pending}
+
+        for job_id, events in pending.items():
+            job = jobs[job_id]
+            if job is None:
+                continue  # Submitted directly to the runner, not through the bridge
+            if events["dropped"]:
+                job.output_signal.emit(f"... {events['dropped']} lines skipped ...")
+            if events["lines"]:
+                job.output_signal.emit("\n".join(events["lines"]))
+            if events["progress"] is not None:
+                job.progress_signal.emit(events["progress"])
+
+            state = events["state"]
+            if state is None:
+                continue
+            job.state = state["state"]
+            if job.state not in DONE_STATES:
+                continue
+            with self.lock:
+                self.jobs.pop(job_id, None)
+            if job.state == FINISHED:
+                job.finished_signal.emit(True)
+            elif job.state == CANCELLED:
+                job.error_signal.emit("Rsync operation cancelled")
+            else:
+                job.error_signal.emit(state["error"] or "Rsync operation failed")
+            job.deleteLater()
+
+    def shutdown(self):
+        """
+        Stops the drain timer and the runner.
+        """
+        self.timer.stop()
+        self.runner.stop()
@@ -0,0 +1,385 @@
+import os
+import shlex
+import subprocess
+import threading
+import time
+
+from path_utils import is_remote_destination, seed_target
+from rsync_manager import RsyncThread
+
+RELAY_CHUNK_SIZE = 1024 * 1024
+SEED_PROGRESS_SHARE = 90  # The remaining share of the progress bar covers the rsync pass
+MAX_SEED_ENTRIES = 2000  # Bounds the tar command lines when large directories are split
+
+
+def destination_is_empty(dest):
+    """
+    Returns True if the destination does not exist yet or is an empty directory.
+
+    Remote destinations are checked over ssh; if the host cannot be reached the
+    destination is treated as non-empty so that the normal rsync path is used.
+
+    Args:
+        dest (str): The destination path, local or `host:path`.
+    """
+    if is_remote_destination(dest):
+        host, path = dest.split(":", 1)
+        path = shlex.quote(path or ".")
+        check = f"test ! -e {path} || test -z \"$(ls -A {path})\""
+        try:
+            result = subprocess.run(
+                ["ssh", "-o", "BatchMode=yes", host, check],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=10,
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return False
+        return result.returncode == 0
+    if not os.path.exists(dest):
+        return True
+    return os.path.isdir(dest) and not os.listdir(dest)
+
+
+def partition_subtrees(source, streams):
+    """
+    Splits the source tree into groups of entries of roughly equal size.
+
+    A directory larger than an even share of the tree is replaced by its own entries, so a
+    single dominant subtree (a home directory holding most of the data, say) is still spread
+    over several streams. The directories split this way are created by tar without their
+    attributes, which the rsync pass that follows restores.
+
+    Args:
+        source (str): The source directory.
+        streams (int): The number of groups to produce.
+
+    Returns:
+        tuple: (groups, total_bytes, total_files), where each group is a list of paths
+        relative to the source.
+    """
+    # Bytes below each directory, gathered in one bottom-up walk
+    directory_sizes = {}
+    total_files = 0
+    for root, directories, files in os.walk(source, topdown=False):
+        size = 0
+        for file in files:
+            try:
+                size += os.lstat(os.path.join(root, file)).st_size
+            except OSError:
+                pass
+        for directory in directories:
+            size += directory_sizes.get(os.path.join(root, directory), 0)
+        directory_sizes[root] = size
+        total_files += len(files)
+
+    def list_entries(relative_dir):
+        entries = []
+        with os.scandir(os.path.join(source, relative_dir)) as scan:
+            for entry in scan:
+                relative_path = os.path.join(relative_dir, entry.name)
+                if entry.is_dir(follow_symlinks=False):
+                    entries.append((directory_sizes.get(entry.path, 0), relative_path, True))
+                else:
+                    try:
+                        entries.append((entry.stat(follow_symlinks=False).st_size, relative_path, False))
+                    except OSError:
+                        pass
+        return entries
+
+    entries = list_entries("")
+    share = directory_sizes.get(source, 0) / max(streams, 1)
+    while len(entries) < MAX_SEED_ENTRIES:
+        largest = max(entries, default=None)
+        if largest is None or not largest[2] or largest[0] <= share:
+            break
+        entries.remove(largest)
+        entries.extend(list_entries(largest[1]))
+
+    # Greedy largest-first packing keeps the streams balanced
+    groups = [[] for _ in range(max(1, min(streams, len(entries))))]
+    group_sizes = [0] * len(groups)
+    for size, relative_path, _ in sorted(entries, reverse=True):
+        index = group_sizes.index(min(group_sizes))
+        groups[index].append(relative_path)
+        group_sizes[index] += size
+    return [group for group in groups if group], sum(group_sizes), total_files
+
+
+def bandwidth_limit(options):
+    """
+    Returns the `--bwlimit` of an rsync command line in bytes per second, or 0 if unlimited.
+
+    Args:
+        options (list): The rsync command line.
+    """
+    for index, option in enumerate(options):
+        if option == "--bwlimit" and index + 1 < len(options):
+            return int(options[index + 1]) * 1024
+        if option.startswith("--bwlimit="):
+            return int(option.split("=", 1)[1]) * 1024
+    return 0
+
+
+def exclude_arguments(options):
+    """
+    Translates the rsync `--exclude` options into tar arguments.
+
+    Args:
+        options (list): The rsync command line.
+    """
+    arguments = []
+    for index, option in enumerate(options[:-1]):
+        if option == "--exclude":
+            arguments.append(f"--exclude={options[index + 1]}")
+    return arguments
+
+
+class SeedThread(RsyncThread):
+    """
+    Thread that performs the first copy into an empty destination with parallel tar streams.
+
+    The source is split into balanced groups of subtrees and each group is
+    streamed through its own `tar` pipe, locally or to `tar` on the remote host over ssh.
+    A normal rsync pass follows to verify the result and fix up anything tar did not carry.
+    The streams honor the profile's bandwidth limit, shared across all of them, and remote
+    streams are compressed by ssh when compression is enabled.
+
+    Methods:
+        __init__(options, source, dest, streams):
+            Initializes the thread with the rsync options, paths and stream count.
+
+        run():
+            Streams the tree, reports the seed throughput and runs the rsync pass.
+    """
+
+    def __init__(self, options, source, dest, streams=4):
+        """
+        Initializes the SeedThread object.
+
+        Args:
+            options (list): The rsync executable followed by its options, without paths.
+            source (str): The source directory.
+            dest (str): The empty or missing destination.
+            streams (int): Number of tar streams run in parallel.
+        """
+        super().__init__(options + [source, dest])
+        self.options = options
+        self.source = source
+        self.dest = dest
+        self.streams = streams
+        self.processes = []
+        self.lock = threading.Lock()
+        self.bytes_streamed = 0
+        self.total_bytes = 0
+        self.rate = bandwidth_limit(options)
+        self.seed_start = None
+
+    def run(self):
+        """
+        Streams the tree, reports the seed throughput and runs the rsync pass.
+        """
+        try:
+            groups, self.total_bytes, total_files = partition_subtrees(self.source, self.streams)
+            target = seed_target(self.source, self.dest)
+            self.output_signal.emit(
+                f"Seeding {total_files} files ({self.total_bytes / 1048576:.1f} MB) "
+                f"with {len(groups)} parallel streams"
+            )
+            self.make_target(target)
+
+            self.seed_start = time.monotonic()
+            results = []
+            workers = [
+                threading.Thread(target=self.stream_group, args=(group, target, results))
+                for group in groups
+            ]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+            seed_seconds = max(time.monotonic() - self.seed_start, 1e-6)
+
+            if not self.is_running:
+                self.error_signal.emit("Rsync operation cancelled")
+                return
+            failed = [code for code in results if code != 0]
+            if failed or (groups and not results):
+                self.error_signal.emit(f"Seeding failed: tar exited with code {failed[0] if failed else -1}")
+                return
+
+            if groups:
+                self.output_signal.emit(
+                        f"Seeded {self.bytes_streamed / 1048576:.1f} MB of archive data in {seed_seconds:.1f}s "
+                    f"({self.bytes_streamed / 1048576 / seed_seconds:.1f} MB/s, "
+                    f"{total_files / seed_seconds:.0f} files/s)"
+                )
+
+            self.output_signal.emit("Verifying with rsync")
+            verify_start = time.monotonic()
+            returncode = self.run_command(self.command, self.verify_progress)
+            if returncode == 0:
+                self.output_signal.emit(
+                    f"Verification pass finished in {time.monotonic() - verify_start:.1f}s"
+                )
+                self.finished_signal.emit(True)
+            else:
+                self.error_signal.emit(f"Rsync exited with code {returncode}")
+        except Exception as e:
+            self.error_signal.emit(str(e))
+
+    def make_target(self, target):
+        """
+        Creates the directory the tar streams unpack into.
+
+        Args:
+            target (str): The target directory, local or `host:path`.
+        """
+        if is_remote_destination(target):
+            host, path = target.split(":", 1)
+            subprocess.run(["ssh", host, f"mkdir -p {shlex.quote(path)}"], check=True)
+        else:
+            os.makedirs(target, exist_ok=True)
+
+    def stream_group(self, group, target, results):
+        """
+        Pipes one group of entries from a `tar` reader to a `tar` writer.
+
+        Data is relayed through this process so the number of streamed bytes can be reported
+        and the bandwidth limit applied.
+
+        Args:
+            group (list): Paths relative to the source to stream.
+            target (str): The directory to unpack into.
+            results (list): Receives the exit codes of both tar processes, or -1 if the
+                stream could not be run.
+        """
+        reader_command = (
+            ["tar", "-cf", "-"] + exclude_arguments(self.options) + ["-C", self.source, "--"] + group
+        )
+        if is_remote_destination(target):
+            host, path = target.split(":", 1)
+            ssh = ["ssh", "-C"] if "--compress" in self.options else ["ssh"]
+            writer_command = ssh + [host, f"tar -xpf - -C {shlex.quote(path)}"]
+        else:
+            writer_command = ["tar", "-xpf", "-", "-C", target]
+        # Smaller reads keep a throttled stream smooth
+        chunk_size = min(RELAY_CHUNK_SIZE, max(self.rate // 10, 65536)) if self.rate else RELAY_CHUNK_SIZE
+
+        processes = []
+        try:
+            reader = subprocess.Popen(reader_command, stdout=subprocess.PIPE)
+            processes.append(reader)
+            writer = subprocess.Popen(writer_command, stdin=subprocess.PIPE)
+            processes.append(writer)
+            with self.lock:
+                self.processes.extend(processes)
+
+            try:
+                while self.is_running:
+                    chunk = reader.stdout.read(chunk_size)
+                    if not chunk:
+                        break
+                    writer.stdin.write(chunk)
+                    self.stream_progress(len(chunk))
+                    self.throttle()
+            except BrokenPipeError:
+                pass
+            finally:
+                writer.stdin.close()
+                reader.stdout.close()
+            returncodes = [reader.wait(), writer.wait()]
+        except Exception as e:
+            self.output_signal.emit(f"Seed stream failed: {e}")
+            for process in processes:
+                if process.poll() is None:
+                    process.terminate()
+            returncodes = [-1]
+        with self.lock:
+            results.extend(returncodes)
+
+    def throttle(self):
+        """
+        Sleeps as long as the streams are ahead of the bandwidth limit.
+        """
+        if not self.rate:
+            return
+        with self.lock:
+            streamed = self.bytes_streamed
+        delay = streamed / self.rate - (time.monotonic() - self.seed_start)
+        if delay > 0:
+            time.sleep(delay)
+
+    def stream_progress(self, count):
+        """
+        Adds streamed bytes to the total and emits the seeding share of the progress.
+
+        Args:
+            count (int): Number of bytes just relayed.
+        """
+        with self.lock:
+            before = self.bytes_streamed
+            self.bytes_streamed += count
+            total = max(self.total_bytes, 1)
+        # Archive headers make the stream slightly larger than the file data
+        previous = min(int(before * SEED_PROGRESS_SHARE / total), SEED_PROGRESS_SHARE)
+        current = min(int(self.bytes_streamed * SEED_PROGRESS_SHARE / total), SEED_PROGRESS_SHARE)
+        if current != previous:
+            self.progress_signal.emit(current)
+
+    def verify_progress(self, value):
+        """
+        Maps the progress of the rsync pass onto the end of the progress bar.
+
+        Args:
+            value (int): Progress percentage of the rsync pass.
+        """
+        self.progress_signal.emit(
+            SEED_PROGRESS_SHARE + int(value * (100 - SEED_PROGRESS_SHARE) / 100)
+        )
+
+    def stop(self):
+        """
+        Terminates the tar streams and the rsync pass.
+        """
+        super().stop()
+        with self.lock:
+            for process in self.processes:
+                if process.poll() is None:
+                    process.terminate()
+
+
+def benchmark_seed(source, scratch, streams=4):
+    """
+    Seeds the same source into two scratch directories, once with tar streams and once
+    with a plain rsync, and returns the elapsed seconds of each.
+
+    Args:
+        source (str): The source directory.
+        scratch (str): An empty directory that receives both copies.
+        streams (int): Number of tar streams run in parallel.
+
+    Returns:
+        tuple: (seed_seconds, rsync_seconds)
+    """
+    seed_thread = SeedThread(["rsync", "-a"], source, os.path.join(scratch, "seed"), streams)
+    seed_thread.output_signal.connect(print)
+    seed_thread.error_signal.connect(print)
+    start = time.monotonic()
+    seed_thread.run()
+    seed_seconds = time.monotonic() - start
+
+    start = time.monotonic()
+    subprocess.run(["rsync", "-a", source, os.path.join(scratch, "rsync")], check=True)
+    rsync_seconds = time.monotonic() - start
+    return seed_seconds, rsync_seconds
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 3:
+        print("Usage: python seed_manager.py SOURCE SCRATCH_DIR [STREAMS]")
+        sys.exit(1)
+    seeded, plain = benchmark_seed(sys.argv[1], sys.argv[2], int(sys.argv[3]) if len(sys.argv) > 3 else 4)
+    print(f"Seeding mode: {seeded:.1f}s, plain rsync: {plain:.1f}s ({plain / max(seeded, 1e-6):.1f}x)")
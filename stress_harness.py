@@ -0,0 +1,445 @@
+"""
+Stress harness for SyncMate's rsync output and progress pipeline.
+
+It runs `fake_rsync.py` through the same execution paths as the GUI and reports parse
+throughput, event-loop latency, output delivery latency, lost final progress updates,
+thread count and memory growth as JSON. Limits can be given on the command line, in which
+case the exit status is 1 when any of them is exceeded, so it can gate CI runs.
+
+Examples:
+
+    python stress_harness.py headless --jobs 200 --files 2000
+    python stress_harness.py qt --engine runner --files 1000000 --max-rss-growth-mb 50
+    xvfb-run python stress_harness.py qt --engine thread --malformed 0.01
+    python stress_harness.py soak --jobs 5000 --files 200 --max-rss-growth-mb 10
+
+The `qt` and `soak` modes use the offscreen platform when no display is available. The
+`soak` mode starts SyncMate in tray mode and runs the jobs one after another as scheduled
+tasks, then reports the memory growth after a warm-up period.
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import threading
+import time
+
+from process_stats import rss_bytes, thread_count
+
+FAKE_RSYNC = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_rsync.py")
+TICK_SECONDS = 0.01
+SAMPLE_SECONDS = 0.1
+
+
+class Histogram:
+    """
+    Fixed-memory histogram of durations with logarithmic buckets, so recording millions of
+    samples does not add to the memory growth being measured.
+
+    Percentiles are accurate to the bucket width of about 5%; the maximum is exact.
+    """
+    SMALLEST = 1e-6
+    GROWTH = 1.05
+    BUCKETS = 450  # Up to about 3.5 hours
+
+    def __init__(self):
+        self.buckets = [0] * self.BUCKETS
+        self.count = 0
+        self.maximum = 0.0
+
+    def add(self, value):
+        if value <= self.SMALLEST:
+            index = 0
+        else:
+            index = min(int(math.log(value / self.SMALLEST, self.GROWTH)) + 1, self.BUCKETS - 1)
+        self.buckets[index] += 1
+        self.count += 1
+        self.maximum = max(self.maximum, value)
+
+    def percentile(self, fraction):
+        """
+        Returns the upper bound of the bucket holding the given fraction of the samples.
+        """
+        if not self.count:
+            return 0.0
+        rank = min(self.count - 1, int(self.count * fraction))
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            seen += count
+            if seen > rank:
+                return min(self.SMALLEST * self.GROWTH ** index, self.maximum)
+        return self.maximum
+
+
+class Metrics:
+    """
+    Thread-safe collector of the measurements taken during a run.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.lines = 0
+        self.progress_events = 0
+        self.final_progress = {}
+        self.delivery_latencies = Histogram()
+        self.loop_lags = Histogram()
+        self.rss_start = rss_bytes()
+        self.rss_peak = self.rss_start
+        self.threads_peak = thread_count()
+
+    def add_output(self, text, job):
+        """
+        Counts the lines of an output chunk and records the latency of timestamped lines.
+        """
+        now = time.monotonic()
+        lines = text.split("\n")
+        with self.lock:
+            self.lines += len(lines)
+            for line in lines:
+                if " @" in line:
+                    try:
+                        self.delivery_latencies.add(now - float(line.rsplit(" @", 1)[1]))
+                    except ValueError:
+                        pass
+
+    def add_progress(self, value, job):
+        with self.lock:
+            self.progress_events += 1
+            self.final_progress[job] = value
+
+    def add_lag(self, lag):
+        with self.lock:
+            self.loop_lags.add(lag)
+
+    def sample(self):
+        with self.lock:
+            self.rss_peak = max(self.rss_peak, rss_bytes())
+            self.threads_peak = max(self.threads_peak, thread_count())
+
+    def report(self, jobs, seconds, failures):
+        """
+        Returns the collected measurements as a dictionary.
+        """
+        rss_end = rss_bytes()
+        return {
+            "jobs": jobs,
+            "failed_jobs": failures,
+            "seconds": round(seconds, 3),
+            "lines": self.lines,
+            "lines_per_second": round(self.lines / max(seconds, 1e-6)),
+            "progress_events": self.progress_events,
+            "jobs_missing_final_progress": sum(
+                1 for job in range(jobs) if self.final_progress.get(job) != 100
+            ),
+            "delivery_latency_ms": {
+                "p50": round(self.delivery_latencies.percentile(0.5) * 1000, 2),
+                "p99": round(self.delivery_latencies.percentile(0.99) * 1000, 2),
+                "max": round(self.delivery_latencies.maximum * 1000, 2),
+            },
+            "loop_lag_ms": {
+                "p99": round(self.loop_lags.percentile(0.99) * 1000, 2),
+                "max": round(self.loop_lags.maximum * 1000, 2),
+            },
+            "threads_peak": self.threads_peak,
+            "rss_start_mb": round(self.rss_start / 1048576, 1),
+            "rss_peak_mb": round(self.rss_peak / 1048576, 1),
+            "rss_end_mb": round(rss_end / 1048576, 1),
+            "rss_growth_mb": round((rss_end - self.rss_start) / 1048576, 1),
+        }
+
+
+def fake_environment(args):
+    """
+    Configures fake_rsync.py, which inherits the environment of this process.
+    """
+    os.environ["SYNCMATE_FAKE_FILES"] = str(args.files)
+    os.environ["SYNCMATE_FAKE_UPDATES"] = str(args.updates)
+    os.environ["SYNCMATE_FAKE_MALFORMED"] = str(args.malformed)
+    os.environ["SYNCMATE_FAKE_RATE"] = str(args.rate)
+    os.environ["SYNCMATE_FAKE_TIMESTAMPS"] = "1"
+    if args.replay:
+        os.environ["SYNCMATE_FAKE_REPLAY"] = os.path.abspath(args.replay)
+
+
+def fake_command():
+    return [sys.executable, FAKE_RSYNC, "-a", "--progress", "source", "destination"]
+
+
+def run_headless(args, metrics):
+    """
+    Runs the jobs on the AsyncRunner without Qt.
+
+    Returns:
+        int: The number of failed jobs.
+    """
+    import asyncio
+    from async_runner import AsyncRunner
+
+    runner = AsyncRunner(max_concurrent=args.jobs)
+    job_index = {}
+    submitting = threading.Lock()
+
+    def listener(event):
+        with submitting:
+            job = job_index.get(event["job"])
+        if job is None:
+            return
+        if event["type"] == "output":
+            metrics.add_output(event["line"], job)
+        elif event["type"] == "progress":
+            metrics.add_progress(event["value"], job)
+
+    async def ticker():
+        while True:
+            expected = time.monotonic() + TICK_SECONDS
+            await asyncio.sleep(TICK_SECONDS)
+            metrics.add_lag(max(0.0, time.monotonic() - expected))
+
+    runner.add_listener(listener)
+    runner.start()
+    tick = asyncio.run_coroutine_threadsafe(ticker(), runner.loop)
+    with submitting:
+        for job in range(args.jobs):
+            job_index[runner.submit(fake_command(), name=f"stress {job}")] = job
+
+    failures = 0
+    for job_id in list(job_index):
+        while runner.wait(job_id, SAMPLE_SECONDS)["state"] in ("queued", "running"):
+            metrics.sample()
+        failures += runner.get_job(job_id).state != "finished"
+    tick.cancel()
+    metrics.sample()
+    runner.stop()
+    return failures
+
+
+def soak(args, metrics, submit_and_wait, process_events=lambda: None):
+    """
+    Runs the jobs one after another and samples memory after a warm-up period.
+
+    Args:
+        args: The parsed command line.
+        metrics (Metrics): The collector; its start RSS is reset after the warm-up.
+        submit_and_wait (callable): Runs one job and returns True if it succeeded.
+        process_events (callable): Lets the event loop release deleted objects between jobs.
+
+    Returns:
+        int: The number of failed jobs.
+    """
+    warmup = max(1, args.jobs // 10)
+    failures = 0
+    for job in range(args.jobs):
+        failures += not submit_and_wait(job)
+        process_events()
+        if job + 1 == warmup:
+            metrics.rss_start = rss_bytes()
+        if job % 50 == 0:
+            metrics.sample()
+    metrics.sample()
+    return failures
+
+
+def run_soak(args, metrics):
+    """
+    Soaks tray mode: a `SyncMateGUI(tray_mode=True)` runs every job as a scheduled task
+    through `scheduled_task_due`, with `fake_rsync.py` standing in for rsync. With
+    `--headless`, only the AsyncRunner is soaked.
+
+    Returns:
+        int: The number of failed jobs.
+    """
+    from async_runner import AsyncRunner
+
+    if args.headless:
+        runner = AsyncRunner()
+
+        def listener(event):
+            if event["type"] == "progress":
+                metrics.add_progress(event["value"], event["job"] - 1)
+
+        runner.add_listener(listener)
+
+        def submit_and_wait(job):
+            return runner.wait(runner.submit(fake_command(), name=f"soak {job}"))["state"] == "finished"
+
+        try:
+            return soak(args, metrics, submit_and_wait)
+        finally:
+            runner.stop()
+
+    import tempfile
+
+    if not os.environ.get("DISPLAY") and not os.environ.get("WAYLAND_DISPLAY"):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    os.environ["SYNCMATE_RSYNC"] = FAKE_RSYNC
+    from PySide6.QtCore import QCoreApplication, QEvent, QEventLoop
+    from PySide6.QtWidgets import QApplication, QSystemTrayIcon
+    from control_socket import ControlServer
+    from gui import SyncMateGUI
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    if os.environ.get("QT_QPA_PLATFORM") == "offscreen":
+        # The offscreen platform has no tray, which SyncMateGUI refuses to start without
+        QSystemTrayIcon.isSystemTrayAvailable = staticmethod(lambda: True)
+    # Do not take over the control socket of a SyncMate instance that is running
+    ControlServer.start = lambda self: False
+
+    workdir = tempfile.TemporaryDirectory(prefix="syncmate-soak-")
+    source = os.path.join(workdir.name, "source")
+    os.makedirs(source)
+    task = {"source": source, "destination": os.path.join(workdir.name, "destination"),
+            "verbose": True}
+    gui = SyncMateGUI(tray_mode=True)
+
+    def submit_and_wait(job):
+        gui.scheduled_task_due.emit(task)
+        rsync_job = gui.rsync_thread
+        if rsync_job is None:
+            return False  # Rejected before it started; the GUI reported it through the tray
+        loop = QEventLoop()
+        result = []
+        rsync_job.progress_signal.connect(lambda value: metrics.add_progress(value, job))
+        rsync_job.finished_signal.connect(lambda success: (result.append(success), loop.quit()))
+        rsync_job.error_signal.connect(lambda _: (result.append(False), loop.quit()))
+        if not result:
+            loop.exec()
+        return result == [True]
+
+    def process_events():
+        QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+        app.processEvents()
+
+    try:
+        return soak(args, metrics, submit_and_wait, process_events)
+    finally:
+        gui.tray_icon.hide()
+        gui.runner_bridge.shutdown()
+        workdir.cleanup()
+
+
+def run_qt(args, metrics):
+    """
+    Runs the jobs through the Qt pipeline used by the GUI: either RunnerBridge jobs or one
+    RsyncThread per job, feeding a QTextEdit and a QProgressBar like the output dialog.
+
+    Returns:
+        int: The number of failed jobs.
+    """
+    if not os.environ.get("DISPLAY") and not os.environ.get("WAYLAND_DISPLAY"):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtCore import QTimer
+    from PySide6.QtWidgets import QApplication, QProgressBar, QTextEdit
+
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    output_text = QTextEdit()
+    output_text.setReadOnly(True)
+    progress_bar = QProgressBar()
+
+    if args.engine == "thread":
+        from rsync_manager import RsyncThread
+
+        jobs = [RsyncThread(fake_command()) for _ in range(args.jobs)]
+    else:
+        from async_runner import AsyncRunner
+        from runner_bridge import RunnerBridge
+
+        bridge = RunnerBridge(runner=AsyncRunner(max_concurrent=args.jobs))
+        jobs = [bridge.create_job(fake_command(), name=f"stress {job}") for job in range(args.jobs)]
+
+    results = {}
+
+    def connect(job, index):
+        def update_output(text):
+            metrics.add_output(text, index)
+            output_text.append(text)
+            output_text.ensureCursorVisible()
+
+        def update_progress(value):
+            metrics.add_progress(value, index)
+            progress_bar.setValue(value)
+
+        def done(success):
+            results[index] = success
+            if len(results) == args.jobs:
+                app.quit()
+
+        job.output_signal.connect(update_output)
+        job.progress_signal.connect(update_progress)
+        job.finished_signal.connect(lambda _: done(True))
+        job.error_signal.connect(lambda _: done(False))
+
+    for index, job in enumerate(jobs):
+        connect(job, index)
+
+    last_tick = [time.monotonic()]
+
+    def tick():
+        now = time.monotonic()
+        metrics.add_lag(max(0.0, now - last_tick[0] - TICK_SECONDS))
+        last_tick[0] = now
+        metrics.sample()
+
+    ticker = QTimer()
+    ticker.timeout.connect(tick)
+    ticker.start(int(TICK_SECONDS * 1000))
+
+    for job in jobs:
+        job.start()
+    app.exec()
+    ticker.stop()
+    if args.engine == "thread":
+        for job in jobs:
+            job.wait()
+    else:
+        bridge.shutdown()
+    metrics.sample()
+    return sum(1 for success in results.values() if not success)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stress test the rsync output pipeline.")
+    parser.add_argument("mode", choices=["headless", "qt", "soak"])
+    parser.add_argument("--engine", choices=["runner", "thread"], default="runner",
+                        help="Qt mode only: RunnerBridge jobs or one RsyncThread per job")
+    parser.add_argument("--headless", action="store_true", help="Soak mode only: soak the runner without Qt")
+    parser.add_argument("--jobs", type=int, default=1)
+    parser.add_argument("--files", type=int, default=100000)
+    parser.add_argument("--updates", type=int, default=3)
+    parser.add_argument("--malformed", type=float, default=0.0)
+    parser.add_argument("--rate", type=float, default=0, help="Lines per second per job, 0 for unlimited")
+    parser.add_argument("--replay", help="Recorded rsync output to replay instead of synthetic output")
+    parser.add_argument("--min-lines-per-second", type=float)
+    parser.add_argument("--max-loop-lag-ms", type=float)
+    parser.add_argument("--max-latency-ms", type=float)
+    parser.add_argument("--max-rss-growth-mb", type=float)
+    args = parser.parse_args(argv)
+
+    fake_environment(args)
+    metrics = Metrics()
+    start = time.monotonic()
+    modes = {"headless": run_headless, "qt": run_qt, "soak": run_soak}
+    failures = modes[args.mode](args, metrics)
+    report = metrics.report(args.jobs, time.monotonic() - start, failures)
+    print(json.dumps(report, indent=2))
+
+    violations = []
+    if failures:
+        violations.append(f"{failures} jobs failed")
+    if not args.replay and report["jobs_missing_final_progress"]:
+        violations.append(f"{report['jobs_missing_final_progress']} jobs lost their final progress update")
+    if args.min_lines_per_second is not None and report["lines_per_second"] < args.min_lines_per_second:
+        violations.append("parse throughput below limit")
+    if args.max_loop_lag_ms is not None and report["loop_lag_ms"]["max"] > args.max_loop_lag_ms:
+        violations.append("event loop lag above limit")
+    if args.max_latency_ms is not None and report["delivery_latency_ms"]["p99"] > args.max_latency_ms:
+        violations.append("delivery latency above limit")
+    if args.max_rss_growth_mb is not None and report["rss_growth_mb"] > args.max_rss_growth_mb:
+        violations.append("memory growth above limit")
+    for violation in violations:
+        print(f"FAIL: {violation}", file=sys.stderr)
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+import os
+import threading
+
+from chunk_store import CHUNK_STORE, ChunkStore
+from move_detector import MoveDetector
+from multipass_manager import MultiPassSync
+from rsync_options import build_rsync_options, exclude_pattern_list, split_destinations
+
+CANCEL_POLL_SECONDS = 0.2
+
+
+def run_thread_inline(rsync_thread, report):
+    """
+    Runs an RsyncThread (or subclass) in the calling thread, forwarding its signals to a
+    JobReporter. Used to run thread-based syncs as the prepare step of a runner job.
+
+    Args:
+        rsync_thread (RsyncThread): The thread object; its `run` method is called directly.
+        report (JobReporter): Receives the output and progress.
+
+    Raises:
+        RuntimeError: If the sync reports an error.
+    """
+    from PySide6.QtCore import Qt
+
+    errors = []
+    rsync_thread.output_signal.connect(report, Qt.DirectConnection)
+    rsync_thread.progress_signal.connect(report.progress, Qt.DirectConnection)
+    rsync_thread.error_signal.connect(errors.append, Qt.DirectConnection)
+
+    done = threading.Event()
+
+    def watch_cancellation():
+        while not done.wait(CANCEL_POLL_SECONDS):
+            if report.cancelled:
+                rsync_thread.stop()
+                return
+
+    watcher = threading.Thread(target=watch_cancellation, daemon=True)
+    watcher.start()
+    try:
+        rsync_thread.run()
+    finally:
+        done.set()
+        watcher.join()
+    if errors:
+        raise RuntimeError(errors[0])
+
+
+def build_sync_job(runner, settings, profiles_dir):
+    """
+    Turns profile settings into the command and prepare step of a runner job.
+
+    Move detection and multi-pass mode become prepare steps. A profile with additional
+    destinations runs the fan-out sync as its prepare step, and a chunk store destination
+    runs the backup as its prepare step instead of rsync.
+
+    Args:
+        runner (AsyncRunner): The runner that will execute the job.
+        settings (dict): Profile settings as returned by `SyncMateGUI.get_current_settings`.
+        profiles_dir (str): The profiles directory, whose `.cache` subdirectory holds the hash cache.
+
+    Returns:
+        tuple: (command, prepare), either of which may be None.
+    """
+    settings = dict(settings)
+    for key in ("source_type", "dest_type"):
+        settings.setdefault(key, "Directory")
+    for key in ("exclude_patterns", "extra_destinations"):
+        settings.setdefault(key, "")
+    for key in ("dry_run", "delete", "compress", "verbose", "detect_moves", "multipass"):
+        settings.setdefault(key, False)
+    if not settings.get("source") or not settings.get("destination"):
+        raise ValueError("Both a source and a destination are required")
+
+    source = settings["source"]
+    dest = settings["destination"]
+    if settings["dest_type"] == CHUNK_STORE:
+        store = ChunkStore(dest)
+        exclude_patterns = exclude_pattern_list(settings)
+
+        def backup(report):
+            store.backup(source, report, exclude_patterns, dry_run=settings["dry_run"])
+        return None, backup
+
+    rsync_options = build_rsync_options(settings)
+    extra_destinations = split_destinations(settings["extra_destinations"])
+    if extra_destinations:
+        def fanout(report):
+            from fanout_manager import FanoutRsyncThread  # Only fan-out jobs need Qt
+
+            run_thread_inline(FanoutRsyncThread(rsync_options, source, [dest] + extra_destinations), report)
+        return None, fanout
+
+    command = rsync_options + [source, dest]
+    steps = []
+    if settings["detect_moves"] and settings["source_type"] == "Directory":
+        detector = MoveDetector(
+            source,
+            dest,
+            # Kept out of the profiles themselves, which are every *.json in profiles_dir
+            os.path.join(profiles_dir, ".cache", "hash_cache.json"),
+            keep_originals=not settings["delete"],
+            exclude_patterns=exclude_pattern_list(settings),
+            dry_run=settings["dry_run"],
+        )
+        steps.append(detector.run)
+    if settings["multipass"] and settings["source_type"] == "Directory":
+        multipass = MultiPassSync(
+            runner,
+            rsync_options,
+            source,
+            dest,
+            exclude_pattern_list(settings),
+            # Hard links left by move detection must not be rewritten in place
+            allow_inplace=settings["delete"] or not settings["detect_moves"],
+        )
+        steps.append(multipass.run)
+        command = None  # The passes include the full sync
+
+    if not steps:
+        return command, None
+
+    def prepare(report):
+        for step in steps:
+            step(report)
+    return command, prepare